@@ -0,0 +1,206 @@
+"""
+Add up the game summaries of many games (a series, a week, a season)
+into totals for each team.
+
+An Aggregate holds the totals of any number of games, and two
+aggregates merge into the totals of both with merge(). Merging only
+adds counts, so it does not matter how the games are grouped or in
+what order they are merged: totals can be worked out a chunk of
+games at a time (in different processes, even) and merged at the end,
+or kept up to date as new games are played:
+
+    totals = Aggregate()
+    for summary in summaries:
+        totals.add_game(summary)
+
+    totals = Aggregate.from_games(day1).merge(Aggregate.from_games(day2))
+
+The totals of each team are keyed on the team name, and follow the
+game_summary schema (see parser.py), with the inning-by-inning lists
+added up into single counts:
+
+- games, wins, losses: int
+- box_score: [R, H, E], and box_score_against: [R, H, E] of opponents
+- fielding: {DP, TP}
+- batting: {H: int, LOB: int, 1B/2B/.../RBI: {player_name: count}}
+- baserunning: {SB/CS: {player_name: count}}
+- pitching: {K, BB, HBP: int, W/L: {pitcher_name: count}}
+
+Sections missing from a game summary (with --box-only or --line-only)
+are left out of the totals of that game.
+"""
+
+
+def _merge_counts(a, b):
+    """
+    Add the counts in b to a, in place: dicts are merged key by key,
+    lists item by item, and numbers are added. Returns a.
+    """
+    for k, v in b.items():
+        if k not in a:
+            a[k] = _copy_counts(v)
+        elif isinstance(v, dict):
+            _merge_counts(a[k], v)
+        elif isinstance(v, list):
+            a[k] = [x + y for x, y in zip(a[k], v)]
+        else:
+            a[k] += v
+    return a
+
+
+def _copy_counts(v):
+    """Return a deep copy of a structure of dicts, lists and numbers"""
+    if isinstance(v, dict):
+        return {k: _copy_counts(x) for k, x in v.items()}
+    elif isinstance(v, list):
+        return list(v)
+    return v
+
+
+class Aggregate(object):
+    """
+    Totals of many game summaries for each team, that can be merged
+    """
+    def __init__(self):
+        # Number of games added
+        self.n_games = 0
+        # Seasons of the games added (1-indexed, like in game summaries)
+        self.seasons = set()
+        # Totals of each team, by team name
+        self.teams = {}
+
+    @classmethod
+    def from_games(cls, summaries):
+        """Return the Aggregate of a list of game summary JSONs"""
+        aggregate = cls()
+        for summary in summaries:
+            aggregate.add_game(summary)
+        return aggregate
+
+    def add_game(self, summary):
+        """Add the game summary JSON of one game to the totals"""
+        info = summary['info']
+        self.n_games += 1
+        self.seasons.add(info['season'])
+        for who, other in [('home', 'away'), ('away', 'home')]:
+            team_name = info[who + 'TeamName']
+            team = self.game_totals(summary, who, other)
+            if team_name in self.teams:
+                _merge_counts(self.teams[team_name], team)
+            else:
+                self.teams[team_name] = team
+        return self
+
+    def game_totals(self, summary, who, other):
+        """Return the totals of one team (home or away) in one game"""
+        box = summary['box_score']
+        winner = summary['info'].get('winner', None)
+        if winner is None:
+            # Game summaries made before the winner was in the info
+            # only have the runs counted from the events to go on
+            winner = who if box[who][0] > box[other][0] else other if box[who][0] < box[other][0] else None
+        won = winner==who
+        lost = winner==other
+        team = {
+            'games': 1,
+            'wins': int(won),
+            'losses': int(lost),
+            'box_score': list(box[who]),
+            'box_score_against': list(box[other]),
+        }
+        if 'game_summary' in summary:
+            stats = summary['game_summary'][who]
+            batting = {}
+            for k, v in stats['batting'].items():
+                # Inning-by-inning lists are added up
+                batting[k] = sum(v) if isinstance(v, list) else _copy_counts(v)
+            team['fielding'] = dict(stats['fielding'])
+            team['batting'] = batting
+            team['baserunning'] = _copy_counts(stats['baserunning'])
+        if 'pitching_summary' in summary and (won or lost):
+            # The winning pitcher is on the winning team
+            pitching = summary['pitching_summary']
+            p = 'WP' if won else 'LP'
+            team['pitching'] = {
+                'K': sum(pitching[p + '-K']),
+                'BB': sum(pitching[p + '-BB']),
+                'HBP': sum(pitching.get(p + '-HBP', [])),
+                'W': {pitching['WP']: 1} if won else {},
+                'L': {} if won else {pitching['LP']: 1},
+            }
+        return team
+
+    def merge(self, other):
+        """
+        Add the totals of another Aggregate to this one, in place,
+        and return this one (so merges can be chained or reduced)
+        """
+        self.n_games += other.n_games
+        self.seasons.update(other.seasons)
+        for team_name, team in other.teams.items():
+            if team_name in self.teams:
+                _merge_counts(self.teams[team_name], team)
+            else:
+                self.teams[team_name] = _copy_counts(team)
+        return self
+
+    def get_json(self):
+        """
+        Return the totals as JSON, with teams in alphabetical order and
+        players in each stat from the highest count to the lowest
+        """
+        teams = {}
+        for team_name in sorted(self.teams):
+            team = _copy_counts(self.teams[team_name])
+            for section in ['batting', 'baserunning', 'pitching']:
+                for k, v in team.get(section, {}).items():
+                    if isinstance(v, dict):
+                        team[section][k] = dict(sorted(v.items(), key=lambda item: (-item[1], str(item[0]))))
+            teams[team_name] = team
+        return {
+            'games': self.n_games,
+            'seasons': sorted(self.seasons),
+            'teams': teams
+        }
+
+    @classmethod
+    def from_json(cls, totals):
+        """Return the Aggregate of totals from get_json(), to merge more games into"""
+        aggregate = cls()
+        aggregate.n_games = totals['games']
+        aggregate.seasons = set(totals['seasons'])
+        aggregate.teams = _copy_counts(totals['teams'])
+        return aggregate
+
+    def __eq__(self, other):
+        return isinstance(other, Aggregate) and self.get_json()==other.get_json()
+
+    # Columns of the table of team totals (see get_table())
+    TABLE_COLUMNS = ['Team', 'G', 'W', 'L', 'R', 'H', 'E', 'RA', 'HR', 'SB', 'K']
+
+    def get_table(self):
+        """
+        Return the rows of a table of the main totals of each team
+        (see TABLE_COLUMNS), in alphabetical order of team name
+        """
+        rows = []
+        for team_name in sorted(self.teams):
+            team = self.teams[team_name]
+            batting = team.get('batting', {})
+            baserunning = team.get('baserunning', {})
+            pitching = team.get('pitching', {})
+            rows.append([
+                team_name,
+                team['games'],
+                team['wins'],
+                team['losses'],
+                team['box_score'][0],
+                team['box_score'][1],
+                team['box_score'][2],
+                team['box_score_against'][0],
+                # Grand slams are home runs too
+                sum(batting.get('HR', {}).values()) + sum(batting.get('GS', {}).values()),
+                sum(baserunning.get('SB', {}).values()),
+                pitching.get('K', 0),
+            ])
+        return rows
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import collections
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .data_raw import RawGameData, RawEventData
+from .data_model import GameSummaryData
+from .parser import EventParser, get_name_lookup
+
+
+"""
+Summarize many games in one go.
+
+The games are fetched a chunk at a time, with the requests for the
+games of a chunk made concurrently in threads. The names of all the
+batters of a chunk are looked up at once, then the chunk is sent to
+a pool of worker processes to be parsed, while the next chunk is
+fetched. Parsing in the workers is pure CPU work: the workers are
+sent everything they need, and never make requests of their own.
+
+Summaries are returned in the same order as the game IDs, each as
+soon as it and the summaries before it are ready:
+
+    for game_id, summary in summarize_many(game_ids, options, workers=4):
+        if isinstance(summary, Exception):
+            ...
+
+Game IDs can be given on the command line, or read from a file
+(or from stdin, with the file name -), with read_game_ids().
+
+Game summaries that were already made (with --json or --jsonl) can
+be read back in with read_summaries(), to show them again in another
+format without fetching or parsing the games again.
+"""
+
+
+# Number of processes to parse games in
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Number of games to fetch, and send to a worker, at once
+DEFAULT_CHUNK_SIZE = 16
+
+
+def read_game_ids(path):
+    """
+    Read game IDs from a file (or from stdin, if path is -), one or
+    more to a line, separated by whitespace. Lines starting with #
+    are skipped.
+    """
+    if path=='-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    game_ids = []
+    for line in lines:
+        if line.strip().startswith('#'):
+            continue
+        game_ids += line.split()
+    return game_ids
+
+
+def read_summaries(path):
+    """
+    Read game summary JSONs from a file (or from stdin, if path is -)
+    made with --json or --jsonl: one summary, several one after the
+    other, a list of summaries, or one summary per line. Yields
+    (game_id, summary) for each one. One summary per line (JSON Lines)
+    is read a line at a time, so any number of summaries can be read.
+    """
+    f = sys.stdin if path=='-' else open(path)
+    try:
+        first_line = f.readline()
+        try:
+            first = json.loads(first_line)
+        except ValueError:
+            first = None
+        if isinstance(first, dict):
+            # One summary per line
+            yield first['info']['id'], first
+            for line in f:
+                if line.strip():
+                    summary = json.loads(line)
+                    yield summary['info']['id'], summary
+        else:
+            text = first_line + f.read()
+            decoder = json.JSONDecoder()
+            i = 0
+            while True:
+                while i < len(text) and text[i].isspace():
+                    i += 1
+                if i==len(text):
+                    break
+                value, i = decoder.raw_decode(text, i)
+                for summary in (value if isinstance(value, list) else [value]):
+                    yield summary['info']['id'], summary
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def fetch_chunk(game_ids, options, games=None):
+    """
+    Fetch the game data and events of a chunk of games, concurrently,
+    and look up the names of all their batters at once. Returns the
+    list of (game_id, game, events) for each game (or (game_id,
+    exception, None) for a game that could not be fetched), and the
+    dict of player names. The raw game JSON of games that were already
+    fetched can be passed in games, by game ID, to not fetch it again.
+    """
+    if games is None:
+        games = {}
+
+    def _fetch_one(game_id):
+        try:
+            game = RawGameData(game_id, games.get(game_id, None))
+            events = list(RawEventData(game_id).events())
+            return (game_id, game, events)
+        except Exception as e:
+            return (game_id, e, None)
+
+    with ThreadPoolExecutor(max_workers=GameSummaryData.DEFAULT_CONCURRENCY) as executor:
+        fetched = list(executor.map(_fetch_one, game_ids))
+
+    batter_ids = set(
+        event['batter_id']
+        for game_id, game, events in fetched if events is not None
+        for event in events
+        if event['batter_id']!="UNNOWN"
+    )
+    player_names = {}
+    if len(batter_ids) > 0 and not options.box_only and not options.line_only:
+        player_names = get_name_lookup(options)(list(batter_ids))
+    return fetched, player_names
+
+
+def _no_name_lookup(player_ids):
+    """Name lookup for the workers: the names were all looked up before parsing"""
+    return {}
+
+
+def parse_chunk(fetched, player_names, options):
+    """
+    Parse each game of a chunk fetched with fetch_chunk() (only the
+    games that could be fetched), and return the list of game summary
+    JSONs (or the exception for any game that could not be parsed).
+    This is what the workers run.
+    """
+    results = []
+    for game_id, game, events in fetched:
+        try:
+            parser = EventParser(game, options, dict(player_names), name_lookup=_no_name_lookup)
+            for event in events:
+                parser.parse(event)
+            parser.finalize()
+            results.append(parser.get_json())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def summarize_many(game_ids, options, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, games=None):
+    """
+    Summarize many games, with the parsing spread over a pool of
+    worker processes (or done in this process, if workers is 1 or
+    less). Yields (game_id, summary) in the same order as game_ids,
+    where summary is the game summary JSON, or the exception raised
+    for a game that could not be summarized. games is the raw game
+    JSON of any games that were already fetched, by game ID.
+    """
+    chunks = [game_ids[i:i+chunk_size] for i in range(0, len(game_ids), chunk_size)]
+    if workers <= 1:
+        for chunk in chunks:
+            fetched, player_names = fetch_chunk(chunk, options, games)
+            parsed = parse_chunk(_fetched_games(fetched), player_names, options)
+            for result in _in_order(fetched, parsed):
+                yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a few chunks in flight for each worker, and no more,
+        # so memory does not grow with the number of games
+        pending = collections.deque()
+        for chunk in chunks:
+            fetched, player_names = fetch_chunk(chunk, options, games)
+            future = executor.submit(parse_chunk, _fetched_games(fetched), player_names, options)
+            pending.append((fetched, future))
+            while len(pending) > 2*workers or (len(pending) > 0 and pending[0][1].done()):
+                done_fetched, done_future = pending.popleft()
+                for result in _in_order(done_fetched, done_future.result()):
+                    yield result
+        while len(pending) > 0:
+            done_fetched, done_future = pending.popleft()
+            for result in _in_order(done_fetched, done_future.result()):
+                yield result
+
+
+def _fetched_games(fetched):
+    """The games of a chunk that could be fetched, to send to be parsed"""
+    return [(game_id, game, events) for game_id, game, events in fetched if events is not None]
+
+
+def _in_order(fetched, parsed):
+    """Put the exceptions of games that could not be fetched back in among the parsed games"""
+    parsed = iter(parsed)
+    for game_id, game, events in fetched:
+        if events is None:
+            yield game_id, game
+        else:
+            yield game_id, next(parsed)
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+
+"""
+An on-disk cache for API responses, so that repeated runs of
+game-summary do not have to download the same data again.
+
+Entries are content-addressed: each response is stored in a file
+named after the SHA-256 hash of the URL it came from.
+
+There are two kinds of entries:
+- permanent entries (e.g., data for finished games, which never
+  change) are kept forever
+- all other entries expire after a time-to-live, and are evicted
+  least-recently-used first when the cache grows past its max size
+
+Writes go to a temporary file that is then renamed into place,
+so several game-summary processes can share one cache directory.
+
+Each entry file has a one-line JSON header (the URL and the time
+the entry was stored), followed by the response body exactly as
+it was received, so large responses can be streamed back out of
+the cache (see open()) without decoding them all at once.
+"""
+
+
+class ResponseCache(object):
+    """
+    Store JSON responses from the API in a cache directory.
+    """
+    PERMANENT_DIR = "permanent"
+    TTL_DIR = "ttl"
+    # Default time-to-live for non-permanent entries, in seconds
+    DEFAULT_TTL = 24*60*60
+    # Default max size of non-permanent entries, in bytes
+    DEFAULT_MAX_SIZE = 100*1024*1024
+
+    def __init__(self, cache_dir, ttl=None, max_size=None):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+        self.max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        for subdir in [self.PERMANENT_DIR, self.TTL_DIR]:
+            os.makedirs(os.path.join(self.cache_dir, subdir), exist_ok=True)
+
+    def key(self, url):
+        """Turn a URL into the name of its cache entry"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, subdir, url):
+        return os.path.join(self.cache_dir, subdir, self.key(url) + ".json")
+
+    def get(self, url):
+        """
+        Return the cached data for this URL, or None if it is not cached
+        (or if it has expired)
+        """
+        f = self.open(url)
+        if f is None:
+            return None
+        with f:
+            try:
+                return json.load(f)
+            except ValueError:
+                # (Unlikely) partial or corrupted entry
+                return None
+
+    def open(self, url):
+        """
+        Return a binary file object positioned at the start of the
+        cached response body for this URL, or None if it is not cached
+        (or if it has expired). The caller must close the file.
+        """
+        # Permanent entries never expire
+        f, _ = self._open(self._path(self.PERMANENT_DIR, url))
+        if f is not None:
+            return f
+
+        path = self._path(self.TTL_DIR, url)
+        f, header = self._open(path)
+        if f is None:
+            return None
+        if time.time() - header['stored_at'] > self.ttl:
+            f.close()
+            self._remove(path)
+            return None
+        # Bump the modification time, which is used
+        # as the last-access time for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return f
+
+    def set(self, url, data, permanent=False):
+        """Store the data for this URL in the cache"""
+        self.set_body(url, json.dumps(data).encode('utf-8'), permanent=permanent)
+
+    def set_body(self, url, body, permanent=False):
+        """Store the raw response body (bytes) for this URL in the cache"""
+        for _ in self.tee(url, [body], lambda: permanent):
+            pass
+
+    def tee(self, url, chunks, permanent=lambda: False):
+        """
+        Pass through an iterable of response body chunks (bytes), while
+        also writing them to the cache entry for this URL. The entry is
+        only stored once every chunk has been read. At that point,
+        permanent() is called to decide which kind of entry it is.
+        """
+        # Write to a temporary file, then atomically move it into place
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.cache_dir, self.TTL_DIR), suffix=".tmp")
+        committed = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._header(url))
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+                f.flush()
+                os.fsync(f.fileno())
+            is_permanent = permanent()
+            subdir = self.PERMANENT_DIR if is_permanent else self.TTL_DIR
+            os.replace(tmp_path, self._path(subdir, url))
+            committed = True
+        finally:
+            if not committed:
+                self._remove(tmp_path)
+        if not is_permanent:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove least-recently-used non-permanent entries
+        until the cache is below its max size
+        """
+        ttl_dir = os.path.join(self.cache_dir, self.TTL_DIR)
+        entries = []
+        total_size = 0
+        for name in os.listdir(ttl_dir):
+            if not name.endswith(".json"):
+                # Skip temporary files that are still being written
+                continue
+            path = os.path.join(ttl_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                # Another process got to it first
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total_size += st.st_size
+
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            self._remove(path)
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def _header(self, url):
+        header = dict(
+            url = url,
+            stored_at = time.time()
+        )
+        return (json.dumps(header) + "\n").encode('utf-8')
+
+    def _open(self, path):
+        """
+        Open a cache entry and read its header. Returns the file object
+        (positioned at the response body) and the header, or (None, None)
+        if the entry does not exist.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None, None
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            # (Unlikely) partial or corrupted entry
+            f.close()
+            return None, None
+        return f, header
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
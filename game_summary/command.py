@@ -2,12 +2,260 @@ import sys
 import os
 import json
 import configargparse
-from .util import CaptureStdout
-from .view import MarkdownView, TextView, RichView, JsonView
+from .util import CaptureStdout, NoMatchingGames, ApiError, GameParsingError, TieGameException
+from .view import MarkdownView, TextView, RichView, JsonView, JsonLinesView, game_error_message
+from .data_model import GameSummary
+from .aggregate import Aggregate
+from .output import OutputTargets
+from .presentation import Presentation
+from .batch import summarize_many, read_game_ids, read_summaries, DEFAULT_WORKERS, DEFAULT_CHUNK_SIZE
+from .live import follow, DEFAULT_INTERVAL
+from .cache import ResponseCache
+from .sources import SOURCES, HttpSource, make_source, set_source
+from .session import ApiSession, set_session, get_session
+
+
+def add_source_options(p):
+    """Add flags for choosing the data source to the argument parser p"""
+    p.add('--source',
+          required=False,
+          choices=SOURCES,
+          default='http',
+          help='Where to get game data from: the live APIs (http, the default), a directory of JSON dumps (dir), or a SQLite archive (sqlite)')
+    p.add('--source-path',
+          required=False,
+          default=None,
+          help='Path to the directory or SQLite file to get game data from (required by --source dir and --source sqlite)')
+
+
+def add_http_options(p):
+    """Add flags for the HTTP session, paging, and response cache to the argument parser p"""
+    p.add('--page-size',
+          required=False,
+          type=int,
+          default=HttpSource.DEFAULT_PAGE_SIZE,
+          help='Number of events to request from the events API at once (0, the default, to request all events at once)')
+    p.add('--cache-dir',
+          required=False,
+          default=None,
+          help='Cache API responses in this directory (finished games are cached permanently)')
+    p.add('--cache-ttl',
+          required=False,
+          type=int,
+          default=ResponseCache.DEFAULT_TTL,
+          help='Time-to-live in seconds for cached responses that may still change')
+    p.add('--cache-max-size',
+          required=False,
+          type=int,
+          default=ResponseCache.DEFAULT_MAX_SIZE//(1024*1024),
+          help='Max size in MB of cached responses that may still change (least recently used are evicted first)')
+    p.add('--connect-timeout',
+          required=False,
+          type=float,
+          default=ApiSession.DEFAULT_CONNECT_TIMEOUT,
+          help='Seconds to wait when connecting to the API before giving up')
+    p.add('--read-timeout',
+          required=False,
+          type=float,
+          default=ApiSession.DEFAULT_READ_TIMEOUT,
+          help='Seconds to wait for the API to respond before giving up')
+    p.add('--retries',
+          required=False,
+          type=int,
+          default=ApiSession.DEFAULT_RETRIES,
+          help='Number of times to retry a request that failed with a 429 or 5xx error, or timed out')
+    p.add('--backoff',
+          required=False,
+          type=float,
+          default=ApiSession.DEFAULT_BACKOFF,
+          help='Seconds to wait before the first retry (doubles on each retry, unless the API sends Retry-After)')
+    p.add('--http-stats',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Print the number of HTTP requests made and retried to stderr when done')
+
+
+def setup_data(options):
+    """
+    Set up the shared HTTP session and the data source,
+    and the response cache if the user asked for one
+    (the cache is only used by the http data source)
+    """
+    set_session(ApiSession(
+        connect_timeout=options.connect_timeout,
+        read_timeout=options.read_timeout,
+        retries=options.retries,
+        backoff=options.backoff
+    ))
+
+    cache = None
+    if options.cache_dir is not None:
+        cache = ResponseCache(
+            options.cache_dir,
+            ttl=options.cache_ttl,
+            max_size=options.cache_max_size*1024*1024
+        )
+
+    # (subcommands without the source flags always use http)
+    source = getattr(options, 'source', 'http')
+    source_path = getattr(options, 'source_path', None)
+    if source!='http' and source_path is None:
+        print("The --source %s option requires a --source-path to be specified"%(source))
+        sys.exit(1)
+    set_source(make_source(
+        source,
+        source_path,
+        cache=cache,
+        page_size=options.page_size
+    ))
+
+
+def ingest_main(sysargs):
+    """
+    The ingest subcommand: store a season of games in a SQLite archive
+
+    game-summary ingest --season 10 --db season10.db
+    """
+    from .ingest import GameStore, ingest, DEFAULT_WORKERS
+
+    p = configargparse.ArgParser(prog='game-summary ingest')
+
+    p.add('-c',
+          '--config',
+          required=False,
+          is_config_file=True,
+          help='config file path')
+
+    p.add('--season',
+          required=True,
+          type=int,
+          help='Season to ingest (1-indexed, like in game summaries)')
+    p.add('--day-start',
+          required=False,
+          type=int,
+          default=1,
+          help='First day of the season to ingest (1-indexed, default is the first day)')
+    p.add('--day-end',
+          required=False,
+          type=int,
+          default=None,
+          help='Last day of the season to ingest (1-indexed, default is the last day with games)')
+    p.add('--db',
+          required=True,
+          help='Path to the SQLite archive to store games in (created if it does not exist)')
+    p.add('--workers',
+          required=False,
+          type=int,
+          default=DEFAULT_WORKERS,
+          help='Number of games to fetch events for at once')
+    add_http_options(p)
+
+    options = p.parse_args(sysargs)
+    setup_data(options)
+
+    store = GameStore(options.db)
+    try:
+        n_games = ingest(
+            store,
+            options.season-1,
+            day_start=options.day_start-1,
+            day_end=None if options.day_end is None else options.day_end-1,
+            workers=options.workers
+        )
+    finally:
+        store.close()
+    print("Stored %d games in %s"%(n_games, options.db))
+
+    if options.http_stats:
+        get_session().print_stats()
+
+
+def site_main(sysargs):
+    """
+    The site subcommand: build (or bring up to date) a static site of
+    markdown game summaries for a season
+
+    game-summary site --season 10 --out site/
+    """
+    from .site import Site
+
+    p = configargparse.ArgParser(prog='game-summary site')
+
+    p.add('-c',
+          '--config',
+          required=False,
+          is_config_file=True,
+          help='config file path')
+
+    p.add('--season',
+          required=True,
+          type=int,
+          help='Season to build the site for (1-indexed, like in game summaries)')
+    p.add('--out',
+          required=True,
+          help='Directory to build the site in (only new or changed games are rebuilt if it was built before)')
+    p.add('--day-start',
+          required=False,
+          type=int,
+          default=1,
+          help='First day of the season to add to the site (1-indexed, default is the first day)')
+    p.add('--day-end',
+          required=False,
+          type=int,
+          default=None,
+          help='Last day of the season to add to the site (1-indexed, default is the last day with games)')
+    p.add('--force',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Rebuild every page, even those of games that have not changed')
+    p.add('--no-name-lookup',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Do not look up player names over the network, only in a local data source (unknown players are shown by ID)')
+    p.add('--workers',
+          required=False,
+          type=int,
+          default=DEFAULT_WORKERS,
+          help='Number of processes to parse games in (1 to parse them all in this process)')
+    p.add('--chunk-size',
+          required=False,
+          type=int,
+          default=DEFAULT_CHUNK_SIZE,
+          help='Number of games to fetch and hand to a worker process at once')
+    add_source_options(p)
+    add_http_options(p)
+
+    options = p.parse_args(sysargs)
+    setup_data(options)
+
+    site = Site(options.out, options.season, options)
+    if options.force:
+        site.invalidate()
+    site.build(
+        day_start=options.day_start-1,
+        day_end=None if options.day_end is None else options.day_end-1,
+        workers=options.workers,
+        chunk_size=options.chunk_size
+    )
+
+    if options.http_stats:
+        get_session().print_stats()
 
 
 def main(sysargs = sys.argv[1:]):
 
+    if len(sysargs)>0 and sysargs[0]=='ingest':
+        # Subcommand to ingest a season into a SQLite archive
+        ingest_main(sysargs[1:])
+        return
+    if len(sysargs)>0 and sysargs[0]=='site':
+        # Subcommand to build a static site for a season
+        site_main(sysargs[1:])
+        return
+
     p = configargparse.ArgParser()
 
     p.add('-v',
@@ -23,8 +271,10 @@ def main(sysargs = sys.argv[1:]):
           is_config_file=True,
           help='config file path')
 
-    p.add('game_id',
-          help='Specify the game ID of the game to summarize (repeat flag to specify multiple game IDs)')
+    p.add('game_ids',
+          metavar='game_id',
+          nargs='*',
+          help='Specify the game ID of the game to summarize (or several game IDs to summarize them all)')
 
     # View format
     g = p.add_mutually_exclusive_group()
@@ -44,6 +294,10 @@ def main(sysargs = sys.argv[1:]):
           action='store_true',
           default=False,
           help='Output game summaries in JSON format')
+    g.add('--jsonl',
+          action='store_true',
+          default=False,
+          help='Output game summaries in JSON Lines format (one compact game summary per line, written as soon as each game is done)')
 
     # More view options
     h = p.add_mutually_exclusive_group()
@@ -57,6 +311,65 @@ def main(sysargs = sys.argv[1:]):
           required=False,
           default=False,
           help='Only show the line score from the game')
+    p.add('--player-ids',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Also key batting stats by player ID in the JSON output (player names can collide or change)')
+    p.add('--no-name-lookup',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Do not look up player names over the network, only in a local data source (unknown players are shown by ID)')
+
+    # Live options
+    p.add('--follow',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Follow a game in progress, showing the game summary again each time it changes, until the game is over')
+    p.add('--interval',
+          required=False,
+          type=float,
+          default=DEFAULT_INTERVAL,
+          help='Seconds to wait between checks for new events when following a game')
+
+    # Batch options
+    p.add('--ids-file',
+          required=False,
+          default=None,
+          help='Also summarize the game IDs in this file (one or more per line, or - to read them from stdin)')
+    p.add('--workers',
+          required=False,
+          type=int,
+          default=DEFAULT_WORKERS,
+          help='Number of processes to parse games in, when summarizing several games (1 to parse them all in this process)')
+    p.add('--chunk-size',
+          required=False,
+          type=int,
+          default=DEFAULT_CHUNK_SIZE,
+          help='Number of games to fetch and hand to a worker process at once, when summarizing several games')
+
+    p.add('--out',
+          action='append',
+          required=False,
+          default=None,
+          help='Write each game summary to a file in DIR, in FORMAT (json, txt, or md), given as FORMAT:DIR. Repeat to write several formats at once (the summary is only made once)')
+    p.add('--from-json',
+          required=False,
+          default=None,
+          help='Show the game summaries in this file, made earlier with --json or --jsonl (or - to read them from stdin), instead of summarizing games')
+
+    # Aggregate options
+    p.add('--aggregate',
+          action='store_true',
+          required=False,
+          default=False,
+          help='Add up the game summaries of all the game IDs given, and show the totals of each team')
+
+    # Data options
+    add_source_options(p)
+    add_http_options(p)
 
     # Add an --events flag to print each scoring event like the discord bot
 
@@ -80,8 +393,31 @@ def main(sysargs = sys.argv[1:]):
     # Parse arguments
     options = p.parse_args(sysargs)
 
+    if options.follow:
+        # Only finished games are taken from the cache,
+        # anything else has to be checked again for changes
+        options.cache_ttl = 0
+
+    # Set up where game data comes from
+    setup_data(options)
+
+    # Files to write game summaries to (with --out, nothing is
+    # printed unless an output format is also given)
+    outputs = None
+    show = True
+    if options.out is not None:
+        if options.follow or options.aggregate:
+            print("The --out option cannot be used with --follow or --aggregate")
+            sys.exit(1)
+        try:
+            outputs = OutputTargets(options.out)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        show = options.markdown or options.text or options.rich or options.json or options.jsonl
+
     # If the user did not specify output format, use text
-    if (not options.markdown) and (not options.text) and (not options.rich) and (not options.json):
+    if (not options.markdown) and (not options.text) and (not options.rich) and (not options.json) and (not options.jsonl):
         options.json = True
         if options.box_only or options.line_only:
             print("The --box-only and --line-only options require a non-JSON format to be specified:")
@@ -89,18 +425,177 @@ def main(sysargs = sys.argv[1:]):
             sys.exit(0)
 
     if options.markdown:
-        v = MarkdownView(options)
-        v.show()
+        view_class = MarkdownView
     elif options.text:
-        v = TextView(options)
-        v.show()
+        view_class = TextView
     elif options.rich:
-        v = RichView(options)
-        v.show()
+        view_class = RichView
     elif options.json:
-        v = JsonView(options)
+        view_class = JsonView
+    elif options.jsonl:
+        view_class = JsonLinesView
+
+    # Game summaries already made are shown without summarizing again
+    summaries = None
+    if options.from_json is not None:
+        if len(options.game_ids) > 0 or options.ids_file is not None or options.follow:
+            print("The --from-json option cannot be used with game IDs, --ids-file, or --follow")
+            sys.exit(1)
+        summaries = read_summaries(options.from_json)
+    else:
+        if options.ids_file is not None:
+            options.game_ids += read_game_ids(options.ids_file)
+        if len(options.game_ids)==0:
+            print("No game IDs were given to summarize")
+            sys.exit(1)
+
+    n_failed = 0
+    if options.aggregate:
+        n_failed = aggregate_games(options, summaries)
+    elif options.follow and len(options.game_ids) > 1:
+        print("Only one game can be followed at a time")
+        sys.exit(1)
+    elif summaries is not None or len(options.game_ids) > 1 or options.ids_file is not None or outputs is not None:
+        n_failed = summarize_games(options, view_class, summaries, outputs=outputs, show=show)
+    elif options.follow:
+        options.game_id = options.game_ids[0]
+        follow_game(options, view_class)
+    else:
+        options.game_id = options.game_ids[0]
+        v = view_class(options)
         v.show()
 
+    if options.http_stats:
+        get_session().print_stats()
+
+    if n_failed > 0:
+        # Like for a single game, exit with an error once
+        # the games that could be summarized are shown
+        sys.exit(1)
+
+
+def game_failed(e):
+    """Return True if a game that raised exception e counts as failed (games that ended in a tie do not)"""
+    return not isinstance(e, TieGameException)
+
+
+def follow_game(options, view_class):
+    """Show the game summary of a game in progress each time it changes"""
+    def _show(summary):
+        v = view_class(options, json_game_data=summary)
+        v.show()
+        sys.stdout.flush()
+    try:
+        follow(options.game_id, options, _show, interval=options.interval)
+    except NoMatchingGames:
+        print(f"No matching games found for game id {options.game_id}. Try using blaseball-game-finder to look for game IDs.")
+        sys.exit(1)
+    except ApiError:
+        print(f"Error reaching API for game id {options.game_id}, check log for details")
+        sys.exit(1)
+    except GameParsingError:
+        print(f"Error parsing events of game id {options.game_id}, use blaseball-game-dump to check the event log for errors")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def summarize_games(options, view_class, summaries=None, outputs=None, show=True):
+    """
+    Summarize many games (see batch.py), and show each one in the
+    same order as the game IDs were given. Games that cannot be
+    summarized are skipped, with a message on stderr. If summaries
+    (game ID and game summary pairs) are given, show those instead.
+    Each summary is also written to any outputs (see output.py).
+    Returns the number of games that failed (see game_failed()).
+    """
+    if summaries is None:
+        summaries = summarize_many(
+            options.game_ids,
+            options,
+            workers=options.workers,
+            chunk_size=options.chunk_size
+        )
+    # Sections the views show (the JSON views show whatever is there)
+    view_classes = [view_class] if show else []
+    if outputs is not None:
+        view_classes += [target[0] for target in outputs.targets]
+    sections = []
+    if any(not issubclass(cls, JsonView) for cls in view_classes):
+        sections = GameSummary.default_sections(options)
+    n_failed = 0
+    for game_id, summary in summaries:
+        if isinstance(summary, Exception):
+            print(game_error_message(game_id, summary), file=sys.stderr)
+            n_failed += game_failed(summary)
+            continue
+        missing = [section for section in sections if section not in summary]
+        if len(missing) > 0:
+            print("Game summary of game id %s is missing sections to show: %s (was it made with --box-only or --line-only?)"%(
+                game_id, ", ".join(missing)
+            ), file=sys.stderr)
+            n_failed += 1
+            continue
+        # (worked out once for all the views that show this game)
+        presentation = Presentation(summary) if len(sections) > 0 else None
+        if show:
+            options.game_id = game_id
+            v = view_class(options, json_game_data=summary, presentation=presentation)
+            v.show()
+        if outputs is not None:
+            outputs.write(options, game_id, summary, presentation=presentation)
+    return n_failed
+
+
+def aggregate_games(options, summaries=None):
+    """
+    Summarize each of the games given, and show the totals of each
+    team (--aggregate). Each game is added to the totals as soon as it
+    is summarized. Games that cannot be summarized are skipped, with a
+    message on stderr. If summaries (game ID and game summary pairs)
+    are given, add those up instead. Returns the number of games that
+    failed (see game_failed()).
+    """
+    if options.rich or options.follow:
+        print("The --aggregate option can only be used with --json, --jsonl, --text, or --markdown")
+        sys.exit(1)
+    if summaries is None:
+        summaries = summarize_many(
+            options.game_ids,
+            options,
+            workers=options.workers,
+            chunk_size=options.chunk_size
+        )
+    totals = Aggregate()
+    n_failed = 0
+    for game_id, summary in summaries:
+        if isinstance(summary, Exception):
+            print(game_error_message(game_id, summary), file=sys.stderr)
+            n_failed += game_failed(summary)
+        else:
+            totals.add_game(summary)
+
+    if options.json:
+        print(json.dumps(totals.get_json(), indent=4))
+        return n_failed
+    elif options.jsonl:
+        print(json.dumps(totals.get_json(), separators=(',', ':')))
+        return n_failed
+    columns = Aggregate.TABLE_COLUMNS
+    rows = totals.get_table()
+    if options.markdown:
+        print("| " + " | ".join(columns) + " |")
+        print("|" + "|".join(["---"] + ["--:"]*(len(columns)-1)) + "|")
+        for row in rows:
+            print("| " + " | ".join(str(x) for x in row) + " |")
+    else:
+        width = max([len(columns[0])] + [len(row[0]) for row in rows])
+        print("%-*s"%(width, columns[0]) + "".join("%6s"%(c) for c in columns[1:]))
+        for row in rows:
+            print("%-*s"%(width, row[0]) + "".join("%6d"%(x) for x in row[1:]))
+    print("\n%d games"%(totals.n_games))
+    return n_failed
+
 
 def game_summary(sysargs):
     with CaptureStdout() as so:
@@ -110,3 +605,4 @@ def game_summary(sysargs):
 
 if __name__ == '__main__':
     main()
+
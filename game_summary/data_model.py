@@ -1,4 +1,5 @@
-import requests
+import copy
+import asyncio
 from .data_raw import RawGameData, RawEventData
 from .parser import EventParser
 
@@ -17,6 +18,25 @@ and assembles the final game summary JSON.
 
 The GameSummaryData wraps this JSON data for the View 
 class to use.
+
+GameSummaryData can also be created with asyncio, which
+fetches the game data and the events concurrently:
+
+    gsd = await GameSummaryData.afetch(game_id, options)
+
+    gsds = await GameSummaryData.afetch_many(game_ids, options, concurrency=8)
+
+A game can be resumed from a checkpoint of its parser (see
+EventParser.checkpoint()), in which case only the events after
+the checkpoint are fetched and parsed:
+
+    gsd = GameSummaryData(game_id, options, checkpoint=checkpoint)
+
+To compute only some sections of the game summary (say, only the
+line scores of many games), use a GameSummary, which parses events
+only as far as the sections asked for need:
+
+    line_score = GameSummary(game_id, options)['line_score']
 """
 
 
@@ -28,15 +48,204 @@ class GameSummaryData(object):
     When the EventParser has parsed all events,
     it can then generate a game summary JSON.
 
+    The raw data is fetched here, unless it is
+    passed in already (see afetch()).
     """
-    def __init__(self, game_id, options):
+    # Default max number of games to fetch at once in afetch_many()
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(self, game_id, options, raw=None, game=None, player_names=None, checkpoint=None, name_lookup=None):
         # fetch raw game data
-        raw = RawEventData(game_id)
-        game = RawGameData(game_id)
-        self.parser = EventParser(game, options)
+        if game is None:
+            game = RawGameData(game_id)
+        # events are streamed into the parser one at a time,
+        # and the parser looks up all player names at the end
+        # (with name_lookup, if given)
+        self.parser = EventParser(game, options, player_names, name_lookup=name_lookup)
+        if checkpoint is not None:
+            self.parser.restore(checkpoint)
+        if raw is None:
+            raw = RawEventData(game_id, first_event=self.parser.n_events)
         for i, event in enumerate(raw.events()):
             self.parser.parse(event)
         self.parser.finalize()
 
     def get_json(self):
         return self.parser.get_json()
+
+    @classmethod
+    async def afetch(cls, game_id, options):
+        """
+        Fetch and parse a game, making the requests for the game data
+        and the events concurrently. (Requests are made, and events are
+        parsed, in the default thread pool executor.)
+        """
+        loop = asyncio.get_running_loop()
+        raw = RawEventData(game_id)
+        game_future = loop.run_in_executor(None, RawGameData, game_id)
+        events_future = loop.run_in_executor(None, raw.start)
+        results = await asyncio.gather(game_future, events_future, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        game = results[0]
+
+        # Player names are looked up (in concurrent chunks) by the parser
+        return await loop.run_in_executor(None, lambda: cls(game_id, options, raw=raw, game=game))
+
+    @classmethod
+    async def afetch_many(cls, game_ids, options, concurrency=DEFAULT_CONCURRENCY, return_exceptions=False):
+        """
+        Fetch and parse many games, with at most `concurrency` games
+        in flight at once. Results are returned in the same order as
+        game_ids. If return_exceptions is True, a game that failed is
+        returned as its exception instead of stopping the whole batch.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch_one(game_id):
+            async with semaphore:
+                return await cls.afetch(game_id, options)
+
+        return await asyncio.gather(
+            *[_fetch_one(game_id) for game_id in game_ids],
+            return_exceptions=return_exceptions
+        )
+
+    @classmethod
+    def fetch_many(cls, game_ids, options, concurrency=DEFAULT_CONCURRENCY, return_exceptions=False):
+        """Blocking version of afetch_many(), for callers without an event loop"""
+        return asyncio.run(cls.afetch_many(
+            game_ids,
+            options,
+            concurrency=concurrency,
+            return_exceptions=return_exceptions
+        ))
+
+
+class GameSummary(object):
+    """
+    A game summary whose sections are only computed when they are
+    asked for, with get_json(sections) or summary[section]:
+
+        summary = GameSummary(game_id, options)
+        line_score = summary['line_score']
+        summary.get_json(['info', 'box_score', 'line_score'])
+
+    Each section is counted by the parser in one of its modes
+    (SECTION_MODES), and the events are parsed in the smallest mode
+    that counts all the sections asked for. Sections are kept once
+    computed, and sections of the same mode that were not asked for
+    are put together later from the same parser, without parsing
+    again. Asking for a section of a bigger mode later parses the
+    events again in that mode (from the events kept the first time
+    they were fetched, without fetching them again). Events parsed
+    in full mode, the biggest, are not kept. Player names are only
+    looked up for the game_summary section.
+    """
+    # The sections of the game summary JSON, in order
+    SECTIONS = ['info', 'box_score', 'line_score', 'pitching_summary', 'game_summary', 'weather_events']
+    # Smallest parser mode that counts each section
+    # ('info' is the box mode, without parsing any events)
+    SECTION_MODES = {
+        'info': 'info',
+        'box_score': 'box',
+        'line_score': 'line',
+        'pitching_summary': 'full',
+        'game_summary': 'full',
+        'weather_events': 'full',
+    }
+    MODES = ['info', 'box', 'line', 'full']
+
+    def __init__(self, game_id, options, game=None, player_names=None, name_lookup=None):
+        self.game_id = game_id
+        self.options = options
+        self.game = game
+        # Shared by every parser of this game, so names are only looked up once
+        if player_names is None:
+            player_names = {}
+        self.player_names = player_names
+        self.name_lookup = name_lookup
+        # The parser, and the mode its events were parsed in
+        self.parser = None
+        self.mode = None
+        # The events of the game, once fetched in a mode smaller than full
+        self.events = None
+        # Sections computed so far
+        self.sections = {}
+
+    @classmethod
+    def default_sections(cls, options):
+        """Return the sections shown with the --box-only and --line-only options"""
+        if options.box_only:
+            return ['info', 'box_score']
+        elif options.line_only:
+            return ['info', 'box_score', 'line_score']
+        return list(cls.SECTIONS)
+
+    def __getitem__(self, section):
+        return self.get_json([section])[section]
+
+    def get_json(self, sections=None):
+        """
+        Return the game summary JSON with only the given sections
+        (by default, the sections for the box/line options), computing
+        any that have not been computed yet
+        """
+        if sections is None:
+            sections = self.default_sections(self.options)
+        for section in sections:
+            if section not in self.SECTION_MODES:
+                raise KeyError("Unknown game summary section: %s"%(section))
+
+        missing = [section for section in sections if section not in self.sections]
+        if len(missing) > 0:
+            mode = max((self.SECTION_MODES[section] for section in missing), key=self.MODES.index)
+            if self.mode is None or self.MODES.index(mode) > self.MODES.index(self.mode):
+                self.parse(mode)
+                self.parser.finalize(missing)
+                summary = self.parser.get_json()
+            else:
+                summary = self.parser.summarize(missing)
+            self.sections['info'] = self.parser.get_json()['info']
+            self.sections.update(summary)
+
+        keys = list(sections)
+        if 'game_summary' in sections:
+            # Player IDs (with --player-ids) go with the game summary
+            keys.append('players')
+        return {k: self.sections[k] for k in self.SECTIONS + ['players'] if k in keys and k in self.sections}
+
+    def parse(self, mode):
+        """Make a new parser for the mode, and parse all the events of the game with it"""
+        options = copy.copy(self.options)
+        options.box_only = mode in ['info', 'box']
+        options.line_only = mode=='line'
+        if self.game is None:
+            self.game = RawGameData(self.game_id)
+        self.parser = EventParser(
+            self.game,
+            options,
+            self.player_names,
+            name_lookup=self.name_lookup
+        )
+        if mode=='info':
+            pass
+        elif self.events is None:
+            # Parse the events as they come in. Unless this is the
+            # biggest mode, keep them in case they need to be parsed
+            # again in a bigger mode.
+            events = RawEventData(self.game_id).events()
+            if mode!='full':
+                self.events = []
+            for event in events:
+                if self.events is not None:
+                    self.events.append(event)
+                self.parser.parse(event)
+        else:
+            for event in self.events:
+                self.parser.parse(event)
+        if mode=='full':
+            # No mode will need the events again
+            self.events = None
+        self.mode = mode
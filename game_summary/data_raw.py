@@ -1,74 +1,88 @@
-import requests
-import json
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-
-
-class NoMatchingGames(Exception):
-    pass
-
-
-class NoMatchingEntity(Exception):
-    pass
-
-
-class ApiError(Exception):
-    pass
+from .sources import get_source
+from .util import NoMatchingGames, NoMatchingEntity, ApiError
 
 
 class EntityData(object):
     """
-    Use the blaseball.com API to turn an entity ID into a name
+    Use the current data source (see sources.py)
+    to turn an entity ID into a name
     """
-    TEAM_ENDPOINT = "https://www.blaseball.com/database/team?ids="
-    PLAYER_ENDPOINT = "https://www.blaseball.com/database/players?ids="
-
     @classmethod
     @lru_cache(maxsize=64)
     def get_team_name_by_id(cls, team_id, long_name=False):
-        url = cls.TEAM_ENDPOINT + team_id
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            raise ApiError()
-        try:
-            team_full = resp.json()
-        except json.JSONDecodeError:
-            raise NoMatchingEntity()
-        else:
-            return team_full['nickname']
+        team_full = get_source().get_team(team_id)
+        return team_full['nickname']
 
     @classmethod
     @lru_cache(maxsize=64)
     def get_player_name_by_id(cls, player_id):
-        url = cls.PLAYER_ENDPOINT + player_id
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            #raise ApiError()
-            return None
-        try:
-            player_full = resp.json()
-        except json.JSONDecodeError:
-            raise NoMatchingEntity()
+        player_names = get_source().get_player_names([player_id])
+        return player_names.get(player_id, None)
+
+    @classmethod
+    def get_player_names_by_ids(cls, player_ids):
+        """
+        Look up the names of many players at once, using as few
+        requests as possible. Returns a dict mapping player ID to
+        player name. IDs that could not be found are left out.
+        """
+        chunks = cls.player_id_chunks(player_ids)
+        player_names = {}
+        if len(chunks) > 1:
+            # Look up the chunks concurrently
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                for result in executor.map(cls.get_player_names_chunk, chunks):
+                    player_names.update(result)
         else:
-            return player_full[0]['name']
+            for chunk in chunks:
+                player_names.update(cls.get_player_names_chunk(chunk))
+        return player_names
+
+    @classmethod
+    def get_known_player_names_by_ids(cls, player_ids):
+        """
+        Look up the names of many players without going over the
+        network: only a local data source (like --source dir or
+        sqlite) is asked. Players with no known name are named by
+        their player ID.
+        """
+        player_ids = set(player_ids)
+        player_names = {j: j for j in player_ids}
+        source = get_source()
+        if source.LOCAL and len(player_ids) > 0:
+            player_names.update(source.get_player_names(player_ids))
+        return player_names
+
+    @classmethod
+    def player_id_chunks(cls, player_ids):
+        """Split player IDs into lists small enough for one request each"""
+        chunk_size = get_source().PLAYER_CHUNK_SIZE
+        player_ids = sorted(set(player_ids))
+        return [
+            player_ids[i:i+chunk_size]
+            for i in range(0, len(player_ids), chunk_size)
+        ]
+
+    @classmethod
+    def get_player_names_chunk(cls, chunk):
+        """Look up the names of one chunk of players with a single request"""
+        return get_source().get_player_names(chunk)
 
 
 class RawGameData(object):
     """
     This class takes a game ID as an input, fetches the
-    raw game outcome JSON from the blaseball-reference.com
-    API, and wraps it so other classes can use it.
+    raw game outcome JSON from the current data source
+    (by default, the blaseball.com API), and wraps it so
+    other classes can use it. (If the raw game JSON was
+    already fetched, it can be passed in as game_full.)
     """
-    ENDPOINT = "https://www.blaseball.com/database/gameById/"
-
-    def __init__(self, game_id):
-        url = self.ENDPOINT + game_id
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            raise ApiError()
-        try:
-            game_full = resp.json()
-        except json.JSONDecodeError:
-            raise NoMatchingGames()
+    def __init__(self, game_id, game_full=None):
+        if game_full is None:
+            game_full = get_source().get_game(game_id)
 
         # Here is the list of useful keys from the
         # raw game data json returned:
@@ -102,28 +116,50 @@ class RawGameData(object):
 class RawEventData(object):
     """
     This class takes a game ID as an input, fetches the
-    raw event JSON from the blaseball-reference.com API,
-    and wraps it so other classes can use it.
+    raw event JSON from the current data source (by default,
+    the blaseball-reference.com API), and wraps it so other
+    classes can use it.
 
     Raw event data is a list of JSON events, 1 event = 1 AB.
+
+    Events are streamed from the data source as events()
+    is iterated, so they can only be iterated once. To resume
+    a game part way through, pass the number of the first
+    event to get as first_event.
     """
-    ENDPOINT = "https://api.blaseball-reference.com/v1/events?gameId="
-    def __init__(self, game_id):
-        url = self.ENDPOINT + game_id
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            raise ApiError()
-        try:
-            self.events_json = resp.json()
-        except JSONDecodeError:
-            raise NoMatchingGames()
-        if len(self.events_json)==0:
-            raise NoMatchingGames()
+    def __init__(self, game_id, first_event=0):
+        self.game_id = game_id
+        self.first_event = first_event
+        self.count = None
+        self._stream = None
+        self._peeked = []
+
+    def start(self):
+        """
+        Make the request for the events now (and wait for the first
+        event to arrive), instead of when events() is first iterated
+        """
+        if self._stream is None:
+            self._stream = self._iter_events()
+            self._peeked = list(itertools.islice(self._stream, 1))
 
     def event_count(self):
-        return self.events_json['count']
+        """Number of events in the game (known once all events have been read, including any skipped by first_event)"""
+        return self.count
 
     def events(self):
-        for event in self.events_json['results']:
+        self.start()
+        for event in self._peeked:
+            yield event
+        self._peeked = []
+        for event in self._stream:
             yield event
 
+    def _iter_events(self):
+        n = 0
+        for event in get_source().iter_events(self.game_id, start=self.first_event):
+            n += 1
+            yield event
+        if n==0 and self.first_event==0:
+            raise NoMatchingGames()
+        self.count = self.first_event + n
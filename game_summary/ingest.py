@@ -0,0 +1,161 @@
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from .sources import SqliteSource, get_source, is_game_finished
+from .data_raw import EntityData
+
+
+"""
+Ingest a season (or part of one) of games into a local SQLite
+archive, which can then be used as a data source with the flags
+--source sqlite --source-path <archive>.
+
+For each day, we fetch the list of games, then the events of each
+game (several games at a time), then the names of all the batters,
+and store everything for that day in one transaction.
+
+Games that are already in the archive and finished are skipped,
+so running the ingest again only fetches new or unfinished games.
+For an unfinished game, only the events after the ones already
+stored are fetched.
+"""
+
+
+class GameStore(SqliteSource):
+    """
+    A SQLite archive of games that can be written to
+    (see SqliteSource for the schema)
+    """
+    INDEXES = """
+    CREATE INDEX IF NOT EXISTS games_season_day ON games (season, day);
+    CREATE INDEX IF NOT EXISTS games_home_team ON games (home_team);
+    CREATE INDEX IF NOT EXISTS games_away_team ON games (away_team);
+    """
+    # Max number of parameters to use in one query
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path):
+        # Create the archive if it does not exist yet
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA + self.INDEXES)
+
+    def finished_game_ids(self, game_ids):
+        """Return the set of these game IDs that are archived and finished"""
+        game_ids = list(game_ids)
+        finished = set()
+        for i in range(0, len(game_ids), self.QUERY_CHUNK_SIZE):
+            chunk = game_ids[i:i+self.QUERY_CHUNK_SIZE]
+            query = "SELECT id FROM games WHERE finished = 1 AND id IN (%s)"%(",".join("?"*len(chunk)))
+            finished.update(row[0] for row in self.conn.execute(query, chunk))
+        return finished
+
+    def event_counts(self, game_ids):
+        """Return a dict of the number of events stored for each of these game IDs"""
+        game_ids = list(game_ids)
+        counts = {}
+        for i in range(0, len(game_ids), self.QUERY_CHUNK_SIZE):
+            chunk = game_ids[i:i+self.QUERY_CHUNK_SIZE]
+            query = "SELECT game_id, COUNT(*) FROM events WHERE game_id IN (%s) GROUP BY game_id"%(",".join("?"*len(chunk)))
+            counts.update(self.conn.execute(query, chunk))
+        return counts
+
+    def add_games(self, games, events, player_names, first_events=None):
+        """
+        Store games (a list of gameById JSON), their events (a dict of
+        game ID to list of events), and player names (a dict of player
+        ID to name), all in one transaction. If first_events has the
+        number of the first event given for a game (a dict of game ID
+        to event number), the events are added after the ones stored
+        before it.
+        """
+        if first_events is None:
+            first_events = {}
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO games (id, season, day, home_team, away_team, finished, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        game['id'],
+                        game['season'],
+                        game['day'],
+                        game.get('homeTeam'),
+                        game.get('awayTeam'),
+                        int(is_game_finished(game)),
+                        json.dumps(game)
+                    )
+                    for game in games
+                ]
+            )
+            for game_id, game_events in events.items():
+                # Replace any events we stored for an unfinished game
+                # from the first one given
+                first_event = first_events.get(game_id, 0)
+                self.conn.execute("DELETE FROM events WHERE game_id = ? AND event_index >= ?", (game_id, first_event))
+                self.conn.executemany(
+                    "INSERT INTO events (game_id, event_index, data) VALUES (?, ?, ?)",
+                    [(game_id, i, json.dumps(event)) for i, event in enumerate(game_events, first_event)]
+                )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO players (id, name) VALUES (?, ?)",
+                list(player_names.items())
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+# Number of games to fetch events for at once
+DEFAULT_WORKERS = 8
+# Stop looking for more days after this one (0-indexed),
+# if no end day was given
+MAX_DAY = 200
+
+
+def ingest(store, season, day_start=0, day_end=None, workers=DEFAULT_WORKERS, log=print):
+    """
+    Fetch every game of a season from day_start to day_end (inclusive),
+    and store them in a GameStore. Season and days are 0-indexed, as in
+    the API. If day_end is None, keep going until a day has no games.
+    Returns the number of games stored.
+    """
+    source = get_source()
+    day = day_start
+    n_games = 0
+    while day_end is None or day <= day_end:
+        if day > MAX_DAY:
+            break
+        games = source.get_games_by_day(season, day)
+        if len(games)==0:
+            if day_end is None:
+                break
+            day += 1
+            continue
+
+        finished = store.finished_game_ids(game['id'] for game in games)
+        todo = [game for game in games if game['id'] not in finished]
+        # Pick up unfinished games after the events already stored
+        first_events = store.event_counts(game['id'] for game in todo)
+
+        # Fetch events of several games at once
+        def _fetch_events(game):
+            return list(source.iter_events(game['id'], start=first_events.get(game['id'], 0)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            all_events = list(executor.map(_fetch_events, todo))
+        events = {game['id']: game_events for game, game_events in zip(todo, all_events)}
+
+        batter_ids = set(
+            event['batter_id']
+            for game_events in all_events
+            for event in game_events
+            if event['batter_id']!="UNNOWN"
+        )
+        player_names = EntityData.get_player_names_by_ids(batter_ids)
+
+        store.add_games(todo, events, player_names, first_events=first_events)
+        n_games += len(todo)
+        log("Season %d Day %d: stored %d games (%d already archived)"%(
+            season+1, day+1, len(todo), len(finished)
+        ))
+        day += 1
+    return n_games
@@ -0,0 +1,149 @@
+import json
+import codecs
+
+
+"""
+Incremental decoding of large JSON responses.
+
+The events API returns one JSON object with a (potentially very long)
+list of events under the 'results' key:
+
+    {"count": 321, "results": [{...}, {...}, ...]}
+
+iter_array_items() decodes this from a stream of chunks and yields
+one event at a time, so the whole list never has to be in memory.
+"""
+
+
+# Read this many bytes/characters at a time
+CHUNK_SIZE = 64*1024
+
+_WHITESPACE = ' \t\n\r'
+
+# Characters that can carry on a number (after '1', as in '1.5e-3')
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _Buffer(object):
+    """
+    A window onto a stream of text chunks. Holds only the part
+    of the stream that has not been decoded yet.
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        """Read the next chunk into the buffer. Returns False at end of stream."""
+        if self.eof:
+            return False
+        # Drop what has already been decoded
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            self.text += self.decoder.decode(b'', final=True)
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self.decoder.decode(chunk)
+        self.text += chunk
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.more():
+                return
+
+    def peek(self):
+        """Return the next non-whitespace character (or '' at end of stream)"""
+        self.skip_whitespace()
+        if self.pos < len(self.text):
+            return self.text[self.pos]
+        return ''
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, which must be one of chars"""
+        c = self.peek()
+        if c=='' or c not in chars:
+            raise json.JSONDecodeError("Expecting one of %r"%(chars), self.text, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self, decoder=json.JSONDecoder()):
+        """Decode the next complete JSON value"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # Value is incomplete, read more and try again
+                if not self.more():
+                    raise
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                # A number at the end of the buffer may be cut off (even
+                # after its '.' or 'e', which raw_decode leaves out),
+                # try again once we can see what comes after it
+                rest = end
+                while rest < len(self.text) and self.text[rest] in _NUMBER_CHARS:
+                    rest += 1
+                if rest==len(self.text) and self.more():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_array_items(chunks, key='results', on_value=None):
+    """
+    Given an iterable of text or bytes chunks making up one JSON
+    object, yield each item of the list stored under the given
+    top-level key. Values of any other top-level keys are passed
+    to on_value(key, value) as they are decoded.
+    """
+    buf = _Buffer(chunks)
+    buf.expect('{')
+    if buf.peek()=='}':
+        buf.pos += 1
+        _finish(buf)
+        return
+    while True:
+        k = buf.value()
+        buf.expect(':')
+        if k==key:
+            buf.expect('[')
+            if buf.peek()==']':
+                buf.pos += 1
+            else:
+                while True:
+                    yield buf.value()
+                    if buf.expect(',]')==']':
+                        break
+        else:
+            v = buf.value()
+            if on_value is not None:
+                on_value(k, v)
+        if buf.expect(',}')=='}':
+            _finish(buf)
+            return
+
+
+def _finish(buf):
+    """Read the rest of the stream, which should be empty"""
+    if buf.peek()!='':
+        raise json.JSONDecodeError("Extra data", buf.text, buf.pos)
+
+
+def iter_file_chunks(f, chunk_size=CHUNK_SIZE):
+    """Read a file object chunk by chunk"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
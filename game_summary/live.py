@@ -0,0 +1,102 @@
+import time
+from .sources import get_source, is_game_finished
+from .data_raw import RawGameData
+from .parser import EventParser
+
+
+"""
+Follow a game while it is being played.
+
+A LiveGame keeps one parser for the game. Each update() asks the
+data source for the game data (for the score) and for only the
+events after the last one parsed, and feeds the new events to the
+parser. snapshot() returns the game summary so far, and the game
+can keep being followed after it. checkpoint() saves the parser
+state, so that following can be picked up again later without
+fetching and parsing the events before it again:
+
+    live = LiveGame(game_id, options, checkpoint=checkpoint)
+
+    live = LiveGame(game_id, options)
+    while not live.finished:
+        if live.update():
+            summary = live.snapshot()
+        time.sleep(5)
+"""
+
+
+class LiveGame(object):
+    """
+    A game in progress, updated with new events as they come in
+    """
+    def __init__(self, game_id, options, player_names=None, checkpoint=None):
+        self.game_id = game_id
+        # Is the game over, with all of its events parsed
+        self.finished = False
+        self.game_full = get_source().get_game(game_id)
+        self.parser = EventParser(
+            RawGameData(game_id, self.game_full),
+            options,
+            player_names,
+            live=True
+        )
+        if checkpoint is not None:
+            self.parser.restore(checkpoint)
+        # The first update always counts as a change
+        self.changed = True
+
+    def update(self):
+        """
+        Fetch the game data and any new events, and parse the new events.
+        Returns True if anything changed since the last update.
+        """
+        changed = self.changed
+        self.changed = False
+
+        game_full = get_source().get_game(self.game_id)
+        if game_full!=self.game_full:
+            self.game_full = game_full
+            self.parser.update_game(RawGameData(self.game_id, game_full))
+            changed = True
+
+        for event in get_source().iter_events(self.game_id, start=self.parser.n_events):
+            self.parser.parse(event)
+            changed = True
+            if event.get('is_last_game_event', False):
+                self.finished = True
+
+        # Some games never get an event marked as the last one
+        if is_game_finished(game_full) and not changed:
+            self.finished = True
+        return changed
+
+    def snapshot(self):
+        """Return the game summary JSON of the game so far"""
+        return self.parser.snapshot()
+
+    def checkpoint(self):
+        """Return a checkpoint of the parser, to pass to a new LiveGame later"""
+        return self.parser.checkpoint()
+
+
+# Default number of seconds to wait between updates of a game in progress
+DEFAULT_INTERVAL = 10
+
+
+def follow(game_id, options, show, interval=DEFAULT_INTERVAL):
+    """
+    Follow a game until it is over, calling show() with the game
+    summary JSON at the start and each time the summary changes
+    """
+    live = LiveGame(game_id, options)
+    last_summary = None
+    while True:
+        if live.update():
+            summary = live.snapshot()
+            if summary!=last_summary:
+                show(summary)
+                last_summary = summary
+        if live.finished:
+            break
+        time.sleep(interval)
+    return last_summary
@@ -0,0 +1,67 @@
+import os
+from .view import JsonView, TextView, MarkdownView
+from .presentation import Presentation
+
+
+"""
+Write game summaries to files, in one or more formats at once.
+
+Each output target is a format and a directory, given on the command
+line as --out FORMAT:DIR (like --out md:site/games/). A game summary
+is computed once (and so is what the views show of it, see
+presentation.py), then each target's view renders it to a string,
+which is written to DIR/<game_id>.<extension> in one write:
+
+    outputs = OutputTargets(['md:out/md', 'json:out/json'])
+    outputs.write(options, game_id, summary)
+"""
+
+
+# View class and file extension of each output format
+OUT_FORMATS = {
+    'json': (JsonView, 'json'),
+    'txt': (TextView, 'txt'),
+    'text': (TextView, 'txt'),
+    'md': (MarkdownView, 'md'),
+    'markdown': (MarkdownView, 'md'),
+}
+
+
+def parse_out_target(target):
+    """
+    Parse an output target FORMAT:DIR into (view class, directory,
+    file extension), raising ValueError if it is not valid
+    """
+    fmt, sep, path = target.partition(':')
+    if sep=='' or path=='':
+        raise ValueError("Output target %s should be FORMAT:DIR, like md:summaries/"%(target))
+    if fmt not in OUT_FORMATS:
+        raise ValueError("Unknown output format %s, use one of: %s"%(fmt, ", ".join(OUT_FORMATS)))
+    view_class, extension = OUT_FORMATS[fmt]
+    return view_class, path, extension
+
+
+class OutputTargets(object):
+    """
+    A list of output targets (see parse_out_target())
+    that each game summary is written to
+    """
+    def __init__(self, targets):
+        self.targets = [parse_out_target(target) for target in targets]
+        for view_class, path, extension in self.targets:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, options, game_id, summary, presentation=None):
+        """
+        Render a game summary with the view of each target, and write
+        it to its file. The presentation of the summary (see
+        presentation.py) is worked out once for all the targets.
+        """
+        # (the views show the game ID from the options)
+        options.game_id = game_id
+        if presentation is None and any(not issubclass(target[0], JsonView) for target in self.targets):
+            presentation = Presentation(summary)
+        for view_class, path, extension in self.targets:
+            text = view_class(options, json_game_data=summary, presentation=presentation).render()
+            with open(os.path.join(path, "%s.%s"%(game_id, extension)), 'w') as f:
+                f.write(text)
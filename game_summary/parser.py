@@ -1,6 +1,8 @@
-import re
+import sys
 import json
+from array import array
 from .data_raw import EntityData
+from .textmatch import get_matcher
 from .util import get_stadium, TieGameException, GameParsingError
 
 
@@ -17,6 +19,7 @@ info:
 - awayOdds:
 - stadium: _
 - weather: _
+- winner: home/away (the team leading, for a game in progress)
 
 box_score:
 - home: [0, 2, 0]
@@ -53,6 +56,10 @@ game_summary:
       - player_name: count
     - LOB: int
     - RBI: int
+  - batting_ids (with --player-ids):
+    - 1B:
+      - player_id: count
+    - (and so on, for each stat keyed by player name in batting)
   - baserunning:
     - SB
       - player_name: count
@@ -69,9 +76,65 @@ game_summary:
   - "X was incinerated"
   - "The blooddrain gurgled"
   - "Y had an allergic reaction"
+
+players (with --player-ids):
+- player_id: player_name
 """
 
 
+class Play(object):
+    """
+    The parts of an event that the game summary needs, worked out
+    once per event so that each stat section does not have to.
+    Each parser reads every event into the same Play.
+    """
+    __slots__ = ['event_type', 'inning', 'top', 'batting', 'fielding', 'batter_id', 'text', 'runs', 'third_out']
+
+    def read(self, event):
+        self.event_type = event['event_type']
+        self.inning = event['inning']
+        self.top = event['top_of_inning']
+        # Away team bats at top of inning, home team fields
+        if self.top:
+            self.batting = 'away'
+            self.fielding = 'home'
+        else:
+            self.batting = 'home'
+            self.fielding = 'away'
+        batter_id = event['batter_id']
+        self.batter_id = None if batter_id=="UNNOWN" else batter_id
+
+        # All the lines of the event text, for searching at once
+        self.text = "\n".join(event['event_text'])
+
+        # Some scoring plays are not labeled as RBIs,
+        # so also check the event text for runs scored
+        rbi = event['runs_batted_in']
+        if rbi > 0 or 'score' in self.text.lower():
+            self.runs = max(1, rbi)
+        else:
+            self.runs = 0
+
+        outs_on_play = event['outs_on_play']
+        self.third_out = outs_on_play > 0 and event['outs_before_play'] + outs_on_play==3
+
+
+def get_name_lookup(options):
+    """
+    Return the function that looks up player names for the parser:
+    from the data source, or with --no-name-lookup, only from a local
+    data source, so that parsing never waits on the network
+    """
+    if getattr(options, 'no_name_lookup', False):
+        return EntityData.get_known_player_names_by_ids
+    return EntityData.get_player_names_by_ids
+
+
+# Tables of the methods that count stats for each event type,
+# by parser class and options (see EventParser.make_dispatch())
+_dispatch_tables = {}
+
+
 class EventParser(object):
     """
     A class to parse a game event-by-event and keep track of the
@@ -96,23 +159,64 @@ class EventParser(object):
     }
     # Names of event types that indicate a hit
     HIT_TYPES = ['SINGLE', 'DOUBLE', 'TRIPLE', 'HOME_RUN']
+    # Batting stat counted for each event type
+    BATTING_EVENTS = {
+        'SINGLE': '1B',
+        'DOUBLE': '2B',
+        'TRIPLE': '3B',
+        'HOME_RUN': 'HR',
+        'STRIKEOUT': 'K',
+        'WALK': 'BB',
+        'SACRIFICE': 'SAC'
+    }
+    # Pitching stat counted for each event type
+    PITCHING_EVENTS = {
+        'STRIKEOUT': 'K',
+        'WALK': 'BB',
+        'HIT_BY_PITCH': 'HBP'
+    }
+    # Baserunning stat counted for each event type
+    BASERUNNING_EVENTS = {
+        'STOLEN_BASE': 'SB',
+        'CAUGHT_STEALING': 'CS'
+    }
+    # How to find the runner's name in the text of a line of a
+    # baserunning event (the event only has the batter's player id)
+    BASERUNNER_NAMES = {
+        'SB': r'^(.*) (stole|steals)',
+        'CS': r'^(.*) gets caught stealing'
+    }
+    # Batting stats that are counted for each batter
+    BATTER_STATS = ['1B', '2B', '3B', 'HR', 'GS', 'K', 'BB', 'SAC', 'GDP', 'GTP', 'RBI']
+    # Column of each batting stat in the batting stat matrices
+    STAT_INDEX = {k: i for i, k in enumerate(BATTER_STATS)}
+    N_STATS = len(BATTER_STATS)
+    # Size of a batter's row of the batting stat matrices (see init_game_summary())
+    ROW_BYTES = 2*N_STATS*array('I').itemsize
+    # Keys of the batting section of the game summary, in order
+    BATTING_KEYS = ['H', '1B', '2B', '3B', 'HR', 'GS', 'K', 'BB', 'SAC', 'GDP', 'GTP', 'LOB', 'RBI']
     # Words in the event text that indicate a weather event (lowercase)
     EVENT_TEXT = ['blooddrain', 'incinerate', 'feedback', 'allergic', 'yummy']
-    # This is the final game summary JSON that we will return
-    game_summary_data = {}
-    # Keep track of runners during an inning
-    n_baserunners = 0
-    # Keep track of who won (to translate home/away to winner/loser)
-    who_won = None
-    # Keep track of shame runs
-    shame_runs_set = False
-
-    def __init__(self, raw_game_data, options):
-        # Store the raw game data JSON from blaseball.com
-        self.game_data = raw_game_data
-
-        # Populate game information for the summary header
-        self.populate_game_info()
+    # Version of the format of checkpoint(), bumped when it changes
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, raw_game_data, options, player_names=None, live=False, name_lookup=None):
+        # Is this game still going (see update_game())
+        self.live = live
+
+        # Map of player ID to player name, for any names already known
+        # (the rest are looked up in bulk in finalize())
+        if player_names is None:
+            player_names = {}
+        self.player_names = player_names
+
+        # Function that takes a list of player IDs and returns a dict
+        # of player ID to player name, called once in finalize()
+        if name_lookup is None:
+            name_lookup = get_name_lookup(options)
+        self.name_lookup = name_lookup
+        # Also add the batting stats by player ID to the game summary
+        self.player_ids = getattr(options, 'player_ids', False)
 
         # Prepare data structures for parsing
         self.box_only = options.box_only
@@ -130,9 +234,65 @@ class EventParser(object):
 
         # Have we seen any events in this half-inning yet
         self.not_leadoff = [[False,]*9, [False]*9]
+        # Map of batter ID to batter number (the order batters were first seen)
+        self.batter_index = {}
+
+        # Methods that count stats for each event type
+        key = (type(self), self.box_only, self.line_only)
+        if key not in _dispatch_tables:
+            _dispatch_tables[key] = self.make_dispatch()
+        self.dispatch = _dispatch_tables[key]
+        self.play = Play()
+        # Searches the event text for weather events and baserunners
+        self.matcher = get_matcher(self.EVENT_TEXT, self.BASERUNNER_NAMES)
+
+        self.reset(raw_game_data)
+
+    def reset(self, raw_game_data):
+        """
+        Get ready to parse a new game, reusing the data structures
+        of the last one. The summary returned by get_json() is built
+        from copies in finalize(), so it is not changed by this.
+        """
+        # Store the raw game data JSON from blaseball.com
+        self.game_data = raw_game_data
+
+        # The final game summary JSON for this game
+        self.game_summary_data = {}
+        # Number of events parsed so far
+        self.n_events = 0
+        # Keep track of runners during an inning
+        self.n_baserunners = 0
+        # Keep track of who won (to translate home/away to winner/loser)
+        self.who_won = None
+        # Keep track of shame runs
+        self.shame_runs_set = False
         # Keep track of whether this is the inning leadoff batter
         self.leadoff = False
 
+        for row in self.not_leadoff:
+            row[:] = [False]*9
+        self.batter_index.clear()
+        for row in self.box_score.values():
+            row[:] = [0]*3
+        if not self.box_only:
+            for row in self.line_score.values():
+                row[:] = [0]*9
+        if not self.box_only and not self.line_only:
+            self.reset_game_summary()
+            del self.weather_events[:]
+
+        # Populate game information for the summary header
+        self.populate_game_info()
+
+    def update_game(self, raw_game_data):
+        """
+        Replace the raw game data of a game in progress (as the score
+        changes), keeping the stats counted from its events so far
+        """
+        self.game_data = raw_game_data
+        self.populate_game_info()
+
     def get_json(self):
         """Return the final game summary JSON"""
         return self.game_summary_data
@@ -152,6 +312,12 @@ class EventParser(object):
             self.who_won = 'home'
         elif self.game_data.game['homeScore'] < self.game_data.game['awayScore']:
             self.who_won = 'away'
+        elif self.live:
+            # A game in progress can be tied, so the team that led
+            # last (or the home team, before anyone scores) is shown
+            # as the winner until the tie is broken
+            if self.who_won is None:
+                self.who_won = 'home'
         else:
             self.who_won = 'tie'
             # Not dealing with this right now, only 6 games whose data was lost anyway?
@@ -167,7 +333,8 @@ class EventParser(object):
             homeOdds = self.game_data.game['homeOdds'],
             awayOdds = self.game_data.game['awayOdds'],
             stadium = get_stadium(self.game_data.game['homeTeamNickname']),
-            weather = self.WEATHER[str(self.game_data.game['weather'])]
+            weather = self.WEATHER[str(self.game_data.game['weather'])],
+            winner = self.who_won
         )
 
     def init_box_score(self):
@@ -201,9 +368,17 @@ class EventParser(object):
         using a nested dictionary structure. See top docstring for schema.
 
         Each stat finally maps to a dictionary, where the key is the player name,
-        and the value is the count
+        and the value is the count.
+
+        While parsing, the batting stats of each batter (BATTER_STATS) are
+        kept in a compact matrix for each team instead: an array of ints with
+        one row for each batter number (see batter_index), which has a column
+        for each stat with its count, then a column for each stat with the
+        order the batter first got it in (from 1, or 0 if not yet). The
+        dictionaries in the final summary are in that order.
         """
         self.game_summary = {}
+        self.batting_stats = {}
         for who in ['home', 'away']:
             self.game_summary[who] = {
                 'fielding': {
@@ -212,18 +387,7 @@ class EventParser(object):
                 },
                 'batting': {
                     'H': [0,]*9,
-                    '1B': {},
-                    '2B': {},
-                    '3B': {},
-                    'HR': {},
-                    'GS': {},
-                    'K': {},
-                    'BB': {},
-                    'SAC': {},
-                    'GDP': {},
-                    'GTP': {},
-                    'LOB': 0,
-                    'RBI': {}
+                    'LOB': 0
                 },
                 'baserunning': {
                     'SB': {},
@@ -235,44 +399,307 @@ class EventParser(object):
                     'HBP': [0,]*9,
                 }
             }
+            self.batting_stats[who] = array('I')
+        # Number of times any batter first got any stat
+        self.n_batting_firsts = 0
+
+    def reset_game_summary(self):
+        """Zero all the counts in the game summary, keeping the structure"""
+        for who in ['home', 'away']:
+            summary = self.game_summary[who]
+            for k in summary['fielding']:
+                summary['fielding'][k] = 0
+            summary['batting']['H'][:] = [0]*9
+            summary['batting']['LOB'] = 0
+            for counts in summary['baserunning'].values():
+                counts.clear()
+            for innings in summary['pitching'].values():
+                innings[:] = [0]*9
+        self.clear_batting()
+
+    def clear_batting(self, n_batters=0):
+        """Zero the batting stat matrices, leaving rows for n_batters batters"""
+        for who in ['home', 'away']:
+            self.batting_stats[who] = array('I', bytes(self.ROW_BYTES*n_batters))
+        self.n_batting_firsts = 0
+
+    def count_batting(self, who, k, batter_id, n=1):
+        """Add n to batting stat k of a batter on the home or away team"""
+        b = self.batter_index.get(batter_id)
+        if b is None:
+            # Add a row for a new batter
+            b = self.batter_index[batter_id] = len(self.batter_index)
+            zeros = bytes(self.ROW_BYTES)
+            for stats in self.batting_stats.values():
+                stats.frombytes(zeros)
+        i = 2*b*self.N_STATS + self.STAT_INDEX[k]
+        stats = self.batting_stats[who]
+        count = stats[i]
+        if count==0:
+            self.n_batting_firsts += 1
+            stats[i + self.N_STATS] = self.n_batting_firsts
+        stats[i] = count + n
+
+    def get_batting(self, who, k):
+        """
+        Return a dictionary of batter ID to count for batting stat k of
+        the home or away team, in the order the batters first got it
+        """
+        stats = self.batting_stats[who]
+        j = self.STAT_INDEX[k]
+        counts = stats[j::2*self.N_STATS]
+        firsts = stats[j+self.N_STATS::2*self.N_STATS]
+        found = sorted((first, b) for b, first in enumerate(firsts) if first > 0)
+        batter_ids = list(self.batter_index)
+        return {batter_ids[b]: counts[b] for first, b in found}
 
     def init_weather_events(self):
         self.weather_events = []
 
+    def make_dispatch(self):
+        """
+        Make the table of methods that count stats, keyed on event
+        type. The methods under the None key are run for every event.
+        The methods are looked up on the class, so that all parsers
+        of a class with the same options can share one table.
+        """
+        cls = type(self)
+        dispatch = {None: []}
+        def add(event_types, method):
+            for event_type in event_types:
+                dispatch.setdefault(event_type, []).append(method)
+
+        dispatch[None] += [cls.parse_box_score]
+        add(self.HIT_TYPES, cls.parse_box_hit)
+        if not self.box_only:
+            dispatch[None] += [cls.parse_line_score]
+        if not self.box_only and not self.line_only:
+            dispatch[None] += [
+                # Runners are only needed for LOB, so count them first
+                cls.update_runner_count,
+                cls.parse_fielding,
+                cls.parse_batting_rbi,
+                cls.parse_batting_lob,
+                cls.parse_weather_events
+            ]
+            add(self.BATTING_EVENTS, cls.parse_batting)
+            add(self.HIT_TYPES, cls.parse_batting_hit)
+            add(['OUT'], cls.parse_batting_out)
+            add(self.BASERUNNING_EVENTS, cls.parse_baserunning)
+            add(self.PITCHING_EVENTS, cls.parse_pitching)
+        return dispatch
+
     def parse(self, event):
-        self.update_leadoff(event)
-        self.update_shameruns(event)
-        self.update_runner_count(event)
+        self.n_events += 1
+        play = self.play
+        play.read(event)
+        self.update_leadoff(event, play)
+        if not self.shame_runs_set:
+            self.update_shameruns(event, play)
+
+        if play.inning>=9 and play.top and self.leadoff and not self.box_only:
+            self.extend_innings()
+
+        for method in self.dispatch[None]:
+            method(self, event, play)
+        for method in self.dispatch.get(play.event_type, ()):
+            method(self, event, play)
+
+    def finalize(self, sections=None):
+        """
+        Put together the final game summary JSON. The running totals are
+        copied, so that resetting the parser for the next game does not
+        change the summary of this one. If sections is given, only
+        those sections are put together (see summarize()).
+        """
+        self.game_summary_data.update(self.summarize(sections))
 
-        if self.box_only:
-            self.parse_box_score(event)
-        elif self.line_only:
-            self.parse_box_score(event)
-            self.parse_line_score(event)
-        else:
-            self.parse_box_score(event)
-            self.parse_line_score(event)
-            self.parse_game_summary(event)
-            self.parse_weather_events(event)
+    def snapshot(self):
+        """
+        Return the game summary JSON of the events parsed so far, without
+        changing the parser, so that more events can be parsed after it
+        (for following a game in progress). This costs the same however
+        many events have been parsed.
+        """
+        summary = dict(self.game_summary_data)
+        summary.update(self.summarize())
+        return summary
+
+    def summarize(self, sections=None):
+        """
+        Return copies of the sections of the game summary counted from
+        the events: all of them, or only those in the list of sections.
+        Player names are only looked up for the game_summary section.
+        """
+        def wanted(section):
+            return sections is None or section in sections
+
+        summary = {}
+        if wanted('box_score'):
+            summary['box_score'] = self._copy_rows(self.box_score)
+        if not self.box_only and wanted('line_score'):
+            # The line score is shown with the R/H/E totals
+            summary['line_score'] = self._copy_rows(self.line_score)
+        if not self.box_only and not self.line_only:
+            if wanted('pitching_summary'):
+                summary['pitching_summary'] = self.finalize_game_summary_pitching()
+            if wanted('game_summary'):
+                self.finalize_player_names()
+                summary['game_summary'] = self.finalize_game_summary()
+            if wanted('weather_events'):
+                summary['weather_events'] = list(self.weather_events)
+            if self.player_ids and wanted('game_summary'):
+                player_ids = set()
+                for who in ['home', 'away']:
+                    for counts in summary['game_summary'][who]['batting_ids'].values():
+                        player_ids.update(counts)
+                summary['players'] = {j: self.get_player_name(j) for j in sorted(player_ids)}
+        return summary
+
+    def checkpoint(self):
+        """
+        Return all the running state of the parser, so that parsing
+        can be picked up later (by another process, even) with
+        restore(), from the event after the last one parsed. The
+        checkpoint is plain JSON data:
+
+        - version: CHECKPOINT_VERSION
+        - game_id, mode ('box', 'line', or 'full'), n_events
+        - state: [n_baserunners, leadoff, shame_runs_set, who_won]
+        - not_leadoff: [top innings, bottom innings], as 0/1
+        - box_score, line_score: [home row, away row]
+        - game_summary: {home/away: {section: counts}} (batting counts
+          are keyed by player ID), and weather_events
+        """
+        checkpoint = dict(
+            version = self.CHECKPOINT_VERSION,
+            game_id = self.game_data.game['id'],
+            mode = self._mode(),
+            n_events = self.n_events,
+            state = [self.n_baserunners, self.leadoff, self.shame_runs_set, self.who_won],
+            not_leadoff = [[int(x) for x in row] for row in self.not_leadoff],
+            box_score = [list(self.box_score[who]) for who in ['home', 'away']]
+        )
+        if not self.box_only:
+            checkpoint['line_score'] = [list(self.line_score[who]) for who in ['home', 'away']]
+        if not self.box_only and not self.line_only:
+            checkpoint['game_summary'] = {
+                who: {
+                    section: {
+                        k: (type(v)(v) if isinstance(v, (dict, list)) else v)
+                        for k, v in counts.items()
+                    }
+                    for section, counts in summary.items()
+                }
+                for who, summary in self.game_summary.items()
+            }
+            for who in ['home', 'away']:
+                for k in self.BATTER_STATS:
+                    checkpoint['game_summary'][who]['batting'][k] = self.get_batting(who, k)
+            checkpoint['weather_events'] = list(self.weather_events)
+        return checkpoint
 
-    def finalize(self):
+    def restore(self, checkpoint):
+        """
+        Pick up parsing from a checkpoint() of the same game, made by
+        a parser with the same box/line options. The next event to
+        parse is event number checkpoint['n_events'].
+        """
+        if checkpoint.get('version')!=self.CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version: %s"%(checkpoint.get('version')))
+        if checkpoint['game_id']!=self.game_data.game['id']:
+            raise ValueError("Checkpoint is for game %s, not %s"%(checkpoint['game_id'], self.game_data.game['id']))
+        if checkpoint['mode']!=self._mode():
+            raise ValueError("Checkpoint is for %s mode, not %s mode"%(checkpoint['mode'], self._mode()))
+        self.batter_index.clear()
+
+        self.n_events = checkpoint['n_events']
+        self.n_baserunners, self.leadoff, self.shame_runs_set, who_won = checkpoint['state']
+        if self.live and self.game_data.game['homeScore']==self.game_data.game['awayScore']:
+            # While a game in progress is tied, the team
+            # that led last is still shown as the winner
+            self.who_won = who_won
+        for row, saved in zip(self.not_leadoff, checkpoint['not_leadoff']):
+            row[:] = [bool(x) for x in saved]
+        for who, saved in zip(['home', 'away'], checkpoint['box_score']):
+            self.box_score[who][:] = saved
+        if not self.box_only:
+            for who, saved in zip(['home', 'away'], checkpoint['line_score']):
+                self.line_score[who][:] = saved
+        if not self.box_only and not self.line_only:
+            self.clear_batting()
+            for who, summary in self.game_summary.items():
+                for section, counts in summary.items():
+                    for k, v in checkpoint['game_summary'][who][section].items():
+                        if section=='batting' and k in self.STAT_INDEX:
+                            for player_id, n in v.items():
+                                self.count_batting(who, k, player_id, n)
+                        elif isinstance(v, dict):
+                            counts[k].clear()
+                            counts[k].update(v)
+                        elif isinstance(v, list):
+                            counts[k][:] = v
+                        else:
+                            counts[k] = v
+            self.weather_events[:] = checkpoint['weather_events']
+
+    def _mode(self):
         if self.box_only:
-            self.game_summary_data['box_score'] = self.box_score
+            return 'box'
         elif self.line_only:
-            self.game_summary_data['line_score'] = self.line_score
-        else:
-            self.game_summary_data['box_score'] = self.box_score
-            self.game_summary_data['line_score'] = self.line_score
-            self.finalize_game_summary_pitching()
-            self.game_summary_data['pitching_summary'] = self.pitching_summary
-            self.game_summary_data['game_summary'] = self.game_summary
-            self.game_summary_data['weather_events'] = self.weather_events
+            return 'line'
+        return 'full'
+
+    def finalize_player_names(self):
+        """
+        Batting stats are counted by player ID while parsing, so that
+        parsing does not wait on name lookups. Now look up the names of
+        all the players at once.
+        """
+        missing_ids = [j for j in self.batter_index if j not in self.player_names]
+        if len(missing_ids) > 0:
+            self.player_names.update(self.name_lookup(missing_ids))
+
+    def finalize_game_summary(self):
+        """
+        Return a copy of the fielding, batting, and baserunning sections
+        of the game summary, with batting stats keyed by player name
+        """
+        game_summary = {}
+        for who in ['home', 'away']:
+            summary = self.game_summary[who]
+            batting = {}
+            for k in self.BATTING_KEYS:
+                if k in self.STAT_INDEX:
+                    by_name = {}
+                    for player_id, n in self.get_batting(who, k).items():
+                        player_name = self.get_player_name(player_id)
+                        by_name[player_name] = by_name.get(player_name, 0) + n
+                    batting[k] = by_name
+                elif isinstance(summary['batting'][k], list):
+                    batting[k] = list(summary['batting'][k])
+                else:
+                    batting[k] = summary['batting'][k]
+            game_summary[who] = {
+                'fielding': dict(summary['fielding']),
+                'batting': batting,
+                'baserunning': {k: dict(v) for k, v in summary['baserunning'].items()}
+            }
+            if self.player_ids:
+                # Names can collide or change, IDs do not
+                game_summary[who]['batting_ids'] = {
+                    k: self.get_batting(who, k)
+                    for k in self.BATTING_KEYS if k in self.STAT_INDEX
+                }
+        return game_summary
 
     def finalize_game_summary_pitching(self):
-        # Remove pitching from game_summary and make it its own section
-        hps, aps = self.game_summary['home'].pop('pitching'), self.game_summary['away'].pop('pitching')
-        self.pitching_summary = {}
-        # Switch from home/away to winner/loser
+        """
+        Return the pitching stats as their own section,
+        switching from home/away to winner/loser
+        """
+        hps, aps = self.game_summary['home']['pitching'], self.game_summary['away']['pitching']
+        pitching_summary = {}
         if self.who_won=='home':
             winnerps = hps
             loserps = aps
@@ -284,25 +711,26 @@ class EventParser(object):
 
         for oldkey in winnerps.keys():
             newkey = "WP-" + oldkey
-            self.pitching_summary[newkey] = winnerps[oldkey]
+            pitching_summary[newkey] = list(winnerps[oldkey])
         for oldkey in loserps.keys():
             newkey = "LP-" + oldkey
-            self.pitching_summary[newkey] = loserps[oldkey]
+            pitching_summary[newkey] = list(loserps[oldkey])
 
         if self.who_won=='home':
-            self.pitching_summary['WP'] = self.game_data.game['homePitcherName']
-            self.pitching_summary['LP'] = self.game_data.game['awayPitcherName']
-        elif self.who_won=='away':
-            self.pitching_summary['WP'] = self.game_data.game['awayPitcherName']
-            self.pitching_summary['LP'] = self.game_data.game['homePitcherName']
+            pitching_summary['WP'] = self.game_data.game['homePitcherName']
+            pitching_summary['LP'] = self.game_data.game['awayPitcherName']
         else:
-            raise TieGameException()
+            pitching_summary['WP'] = self.game_data.game['awayPitcherName']
+            pitching_summary['LP'] = self.game_data.game['homePitcherName']
+        return pitching_summary
+
+    def _copy_rows(self, rows):
+        return {who: list(row) for who, row in rows.items()}
 
-    def update_leadoff(self, event):
+    def update_leadoff(self, event, play):
         self.leadoff = event['is_leadoff']
-        inning = event['inning']
-        top = event['top_of_inning']
-        top_ix = 0 if top else 1
+        inning = play.inning
+        top_ix = 0 if play.top else 1
 
         # Can't trust the leadoff boolean... Some games are off
         try:
@@ -320,22 +748,18 @@ class EventParser(object):
         except IndexError:
             raise GameParsingError()
 
-    def update_shameruns(self, event):
+    def update_shameruns(self, event, play):
         # The targeted shame runs don't show up until the second batter usually
-        if event['inning']<1 and not self.leadoff and not self.shame_runs_set:
-            if event['top_of_inning']:
+        if play.inning<1 and not self.leadoff and not self.shame_runs_set:
+            if play.top:
                 if event['away_score']<0:
-                    temp = self.box_score['away']
-                    temp[0] = event['away_score']
-                    self.box_score['away'] = temp
+                    self.box_score['away'][0] = event['away_score']
             else:
                 if event['home_score']<0:
-                    temp = self.box_score['home']
-                    temp[0] = event['away_score']
-                    self.box_score['home'] = temp
+                    self.box_score['home'][0] = event['away_score']
             self.shame_runs_set = True
 
-    def update_runner_count(self, event):
+    def update_runner_count(self, event, play):
         # If top of inning, reset baserunner count
         if self.leadoff:
             self.n_baserunners = 0
@@ -346,282 +770,103 @@ class EventParser(object):
             self.n_baserunners += 1
             self.n_baserunners -= event['runs_batted_in']
 
-    def parse_box_score(self, event):
-        # Check for runs
-        rbi = False
-        for event_text in event['event_text']:
-            if 'score' in event_text.lower():
-                rbi = True
-        rbi = rbi or event['runs_batted_in'] > 0
-        if rbi > 0:
-            if event['top_of_inning']:
-                label = 'away'
-            else:
-                label = 'home'
-            # Increment runs by number of RBIs
-            # (Note, this is simplistic and may count e.g. people walked home as a "run batted in")
-            temp = self.box_score[label]
-            temp[0] += max(1, event['runs_batted_in'])
-            self.box_score[label] = temp
-
-        # Check for hits
-        if event['event_type'] in self.HIT_TYPES:
-            if event['top_of_inning']:
-                label = 'away'
-            else:
-                label = 'home'
-            # Increment hits by 1
-            temp = self.box_score[label]
-            temp[1] += 1
-            self.box_score[label] = temp
-
-        # Check for errors
+    def extend_innings(self):
+        """Add a column for an extra inning to the inning-by-inning lists"""
+        for who in ['home', 'away']:
+            self.line_score[who].append(0)
+            if not self.line_only:
+                self.game_summary[who]['batting']['H'].append(0)
+                for innings in self.game_summary[who]['pitching'].values():
+                    innings.append(0)
+
+    def parse_box_score(self, event, play):
+        # Increment runs by number of RBIs
+        # (Note, this is simplistic and may count e.g. people walked home as a "run batted in")
+        if play.runs:
+            self.box_score[play.batting][0] += play.runs
+        # Errors are charged to the fielding team
         if event['errors_on_play']:
-            if event['top_of_inning']:
-                label = 'home'
-            else:
-                label = 'away'
-            temp = self.box_score[label]
-            temp[2] += 1
-            self.box_score[label] = temp
-
-    def parse_line_score(self, event):
-        # Update line score with new column if extra innings
-        inning = event['inning']
-        top = event['top_of_inning']
-        top_ix = 0 if top else 1
-        leadoff = self.leadoff
-
-        # Extend inning-by-inning list if extra innings
-        if inning>=9 and top and leadoff:
-            self.line_score['home'] = self.line_score['home'] + [0]
-            self.line_score['away'] = self.line_score['away'] + [0]
-
-        # Update line score with new runs
-        rbi = False
-        for event_text in event['event_text']:
-            if 'score' in event_text.lower():
-                rbi = True
-        rbi = rbi or event['runs_batted_in'] > 0
-        if rbi:
-            if event['top_of_inning']:
-                label = 'away'
-            else:
-                label = 'home'
-            # Increment runs in this inning by number of RBIs
-            temp = self.line_score[label]
-            temp[inning] += max(1, event['runs_batted_in'])
-            self.line_score[label] = temp
-
-    def parse_game_summary(self, event):
-        self.parse_game_summary_fielding(event)
-        self.parse_game_summary_batting(event)
-        self.parse_game_summary_baserunning(event)
-        self.parse_game_summary_pitching(event)
-
-    def parse_game_summary_fielding(self, event):
-        catkey = 'fielding'
-        # Home team defends/pitches at top of inning
-        if event['top_of_inning']:
-            label = 'home'
-        else:
-            label = 'away'
+            self.box_score[play.fielding][2] += 1
 
-        # Increment double plays
-        if event['is_double_play']:
-            self.game_summary[label][catkey]['DP'] += 1
+    def parse_box_hit(self, event, play):
+        self.box_score[play.batting][1] += 1
 
-        # Increment triple plays
-        if event['is_triple_play']:
-            self.game_summary[label][catkey]['TP'] += 1
-
-    def parse_game_summary_batting(self, event):
-        catkey = 'batting'
-        if event['top_of_inning']:
-            label = 'away'
-        else:
-            label = 'home'
-
-        # Extend inning-by-inning list if extra innings
-        inning = event['inning']
-        top = event['top_of_inning']
-        leadoff = self.leadoff
-        if inning>=9 and top and leadoff:
-            for ha in ['home', 'away']:
-                self.game_summary[ha][catkey]['H'] += [0]
-
-        # Class for looking up player/team IDs
-        e = EntityData()
-
-        event_key_map = {
-            'SINGLE': '1B',
-            'DOUBLE': '2B',
-            'TRIPLE': '3B',
-            'HOME_RUN': 'HR',
-            'STRIKEOUT': 'K',
-            'WALK': 'BB',
-            'SACRIFICE': 'SAC'
-        }
-        if event['event_type'] in event_key_map:
-
-            k = event_key_map[event['event_type']]
-
-            # Look up player name
-            batter_id = event['batter_id']
-            if batter_id!="UNNOWN":
-                batter_name = e.get_player_name_by_id(batter_id)
-
-                # Handle the grand slam case
-                rbi = event['runs_batted_in']
-                if rbi==4:
-                    # GS not HR
-                    k = 'GS'
-
-                # Increment this batter's count
-                temp = self.game_summary[label][catkey][k]
-                if batter_name not in temp.keys():
-                    temp[batter_name] = 1
-                else:
-                    temp[batter_name] += 1
-                self.game_summary[label][catkey][k] = temp
-
-                # Increment hits
-                if event['event_type'] in self.HIT_TYPES:
-                    temp = self.game_summary[label][catkey]['H']
-                    temp[inning] += 1
-                    self.game_summary[label][catkey]['H'] = temp
+    def parse_line_score(self, event, play):
+        # Increment runs in this inning by number of RBIs
+        if play.runs:
+            self.line_score[play.batting][play.inning] += play.runs
 
+    def parse_fielding(self, event, play):
+        fielding = self.game_summary[play.fielding]['fielding']
+        if event['is_double_play']:
+            fielding['DP'] += 1
+        if event['is_triple_play']:
+            fielding['TP'] += 1
+
+    def parse_batting(self, event, play):
+        # Batting stats are counted by batter number until
+        # finalize(), when the batters are turned into names
+        if play.batter_id is None:
+            return
+        k = self.BATTING_EVENTS[play.event_type]
+        # Handle the grand slam case (GS not HR)
+        if event['runs_batted_in']==4:
+            k = 'GS'
+        self.count_batting(play.batting, k, play.batter_id)
+
+    def parse_batting_hit(self, event, play):
+        if play.batter_id is not None:
+            self.game_summary[play.batting]['batting']['H'][play.inning] += 1
+
+    def parse_batting_out(self, event, play):
         # Handle GDP and GTP case
-        if event['event_type']=='OUT':
-            if event['is_double_play'] or event['is_triple_play']:
-
-                # Look up player name
-                batter_id = event['batter_id']
-                if batter_id!="UNNOWN":
-                    batter_name = e.get_player_name_by_id(batter_id)
-                    if event['is_double_play']:
-                        k = 'GDP'
-                    else:
-                        k = 'GTP'
-
-                    # Increment this batter's GDP/GTP count
-                    temp = self.game_summary[label][catkey][k]
-                    if batter_name not in temp.keys():
-                        temp[batter_name] = 1
-                    else:
-                        temp[batter_name] += 1
-                    self.game_summary[label][catkey][k] = temp
-
-        # If this is the third out, tabulate LOB
-        if self._is_third_out(event):
-            self.game_summary[label][catkey]['LOB'] += self.n_baserunners
-            # n_baserunners will be reset at the top of the inning,
-            # don't reset here b/c later methods will use it
-
-        # Accumulate RBIs
-        rbi = False
-        for event_text in event['event_text']:
-            if 'score' in event_text.lower():
-                rbi = True
-        rbi = rbi or event['runs_batted_in'] > 0
-        if rbi:
-
-            # Look up player name
-            batter_id = event['batter_id']
-            if batter_id!="UNNOWN":
-                batter_name = e.get_player_name_by_id(batter_id)
-
-                # Increment this player's RBI count
-                temp = self.game_summary[label][catkey]['RBI']
-                if batter_name not in temp.keys():
-                    temp[batter_name] = max(1, event['runs_batted_in'])
-                else:
-                    temp[batter_name] += max(1, event['runs_batted_in'])
-
-    def parse_game_summary_baserunning(self, event):
-        catkey = 'baserunning'
-        # Away is baserunning at top of inning
-        if event['top_of_inning']:
-            label = 'away'
+        if play.batter_id is None:
+            return
+        if event['is_double_play']:
+            k = 'GDP'
+        elif event['is_triple_play']:
+            k = 'GTP'
         else:
-            label = 'home'
-
-        event_key_map = {
-            'CAUGHT_STEALING': 'CS',
-            'STOLEN_BASE': 'SB'
-        }
-        # Both CS and SB will require us to extract the
-        # player name from the game event text, since
-        # they only provide the batter's player id
-        if event['event_type'] in event_key_map:
-            k = event_key_map[event['event_type']]
-
-            # We need to prepare the player name
-            m = None
-            if event['event_type']=='STOLEN_BASE':
-                for event_text in event['event_text']:
-                    m = re.search(r'^(.*) (stole|steals)', event_text)
-                    if m is not None:
-                        break
-            if event['event_type']=='CAUGHT_STEALING':
-                for event_text in event['event_text']:
-                    m = re.search(r'^(.*) gets caught stealing', event_text)
-                    if m is not None:
-                        break
-
-            if m is not None:
-                player_name = m.group(1)
-            else:
-                print("\n".join(event['event_text']))
-                player_name = "UNKNOWN"
+            return
+        self.count_batting(play.batting, k, play.batter_id)
 
-            temp = self.game_summary[label][catkey][k]
-            if player_name in temp:
-                temp[player_name] += 1
-            else:
-                temp[player_name] = 1
-            self.game_summary[label][catkey][k] = temp
-
-    def parse_game_summary_pitching(self, event):
-        catkey = 'pitching'
-        # Home team defends/pitches at top of inning
-        if event['top_of_inning']:
-            label = 'home'
-        else:
-            label = 'away'
-
-        # Extend inning-by-inning list if extra innings
-        inning = event['inning']
-        top = event['top_of_inning']
-        leadoff = self.leadoff
-        if inning>=9 and top and leadoff:
-            for ha in ['home', 'away']:
-                for stat in ['K', 'BB']:
-                    self.game_summary[ha][catkey][stat] += [0]
-
-        # Class for looking up player/team IDs
-        e = EntityData()
-        event_key_map = {
-            'STRIKEOUT': 'K',
-            'WALK': 'BB',
-            'HIT_BY_PITCH': 'HBP'
-        }
-        if event['event_type'] in event_key_map:
-            k = event_key_map[event['event_type']]
-            temp = self.game_summary[label][catkey][k]
-            temp[inning] += 1
-            self.game_summary[label][catkey][k] = temp
-
-    def parse_weather_events(self, event):
+    def parse_batting_lob(self, event, play):
+        # If this is the third out, tabulate LOB
+        # (n_baserunners will be reset at the top of the inning)
+        if play.third_out:
+            self.game_summary[play.batting]['batting']['LOB'] += self.n_baserunners
+
+    def parse_batting_rbi(self, event, play):
+        if play.runs and play.batter_id is not None:
+            self.count_batting(play.batting, 'RBI', play.batter_id, play.runs)
+
+    def parse_baserunning(self, event, play):
+        k = self.BASERUNNING_EVENTS[play.event_type]
+        player_name = self.matcher.find_name(k, play.text)
+        if player_name is None:
+            # (stdout may be a stream of JSON, see --jsonl)
+            print("Could not find the baserunner in: %s"%(play.text), file=sys.stderr)
+            player_name = "UNKNOWN"
+
+        counts = self.game_summary[play.batting]['baserunning'][k]
+        counts[player_name] = counts.get(player_name, 0) + 1
+
+    def parse_pitching(self, event, play):
+        # Home team pitches at top of inning
+        k = self.PITCHING_EVENTS[play.event_type]
+        self.game_summary[play.fielding]['pitching'][k][play.inning] += 1
+
+    def parse_weather_events(self, event, play):
         # Check for weather events (?)
-        for event_text in self.EVENT_TEXT:
-            this_event = event['event_text']
-            for event_line in this_event:
-                if event_text in event_line:
-                    self.weather_events.append(event_line)
-
-    def _is_third_out(self, event):
-        last1 = (event['outs_before_play']==2 and event['outs_on_play']==1)
-        last2 = (event['outs_before_play']==1 and event['outs_on_play']==2)
-        last3 = (event['outs_before_play']==0 and event['outs_on_play']==3)
-        return last1 or last2 or last3
+        weather_lines = self.matcher.keyword_lines(play.text, event['event_text'])
+        if weather_lines:
+            self.weather_events += weather_lines
+
+    def get_player_name(self, player_id):
+        """
+        Get a player name from the map of names already looked up,
+        falling back to asking for any player that is missing
+        """
+        if player_id not in self.player_names:
+            self.player_names[player_id] = self.name_lookup([player_id]).get(player_id, None)
+        return self.player_names[player_id]
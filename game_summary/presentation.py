@@ -0,0 +1,91 @@
+"""
+What the text, rich, and markdown views show, worked out once from
+a game summary JSON: totals, players sorted from the highest count
+to the lowest, and only the rows that are shown. The views only
+format it, so a game summary shown in several formats at once (like
+with --out) is only worked out once:
+
+    presentation = Presentation(summary)
+    TextView(options, json_game_data=summary, presentation=presentation).render()
+    MarkdownView(options, json_game_data=summary, presentation=presentation).render()
+
+Sections missing from the game summary (with --box-only or
+--line-only) are left out of the presentation too.
+"""
+
+
+class Presentation(object):
+    """
+    The presentation of a game summary JSON for the views
+    """
+    # Batting stats shown in team summaries, in order
+    BATTING_STATS = ['GS', 'HR', '3B', '2B', '1B', 'BB', 'K', 'SAC', 'GDP']
+    # Batting stats where players are only shown if they have 2 or more
+    BATTING_STATS_2_OR_MORE = ['1B', 'K', 'BB']
+    # Baserunning stats shown in team summaries, in order
+    BASERUNNING_STATS = ['SB', 'CS']
+
+    def __init__(self, json_game_data):
+        d = json_game_data
+        self.pitchers = None
+        if 'pitching_summary' in d:
+            self.pitchers = self.make_pitchers(d['pitching_summary'])
+        self.teams = None
+        if 'game_summary' in d:
+            self.teams = {
+                who: self.make_team(d['info']['%sTeamNickname'%(who)], d['game_summary'][who])
+                for who in ['away', 'home']
+            }
+        self.weather_events = d.get('weather_events', [])
+
+    def make_pitchers(self, pitching_summary):
+        """
+        Return the winning and losing pitcher, each as a dict with
+        WP or LP, the pitcher's name, and total strikeouts and walks
+        """
+        pitchers = []
+        for p, result in [('WP', 'Winning'), ('LP', 'Losing')]:
+            pitchers.append(dict(
+                key = p,
+                result = result,
+                name = pitching_summary[p],
+                K = sum(pitching_summary[p + '-K']),
+                BB = sum(pitching_summary[p + '-BB'])
+            ))
+        return pitchers
+
+    def make_team(self, nickname, summ):
+        """
+        Return the team summary of one team: fielding stats that
+        happened, total RBIs and LOB, and for each batting and
+        baserunning stat with players to show, the list of
+        (player, count), highest first
+        """
+        team = dict(
+            nickname = nickname,
+            fielding = [(k, summ['fielding'][k]) for k in ['DP', 'TP'] if summ['fielding'][k] > 0],
+            RBI = sum(summ['batting']['RBI'].values()),
+            LOB = summ['batting']['LOB'],
+            batting = [],
+            baserunning = []
+        )
+        for k in self.BATTING_STATS:
+            leaders = self.leaders(summ['batting'][k])
+            if k in self.BATTING_STATS_2_OR_MORE:
+                leaders = [(player, value) for player, value in leaders if value >= 2]
+            if len(leaders) > 0:
+                team['batting'].append((k, leaders))
+        for k in self.BASERUNNING_STATS:
+            leaders = self.leaders(summ['baserunning'][k])
+            if len(leaders) > 0:
+                team['baserunning'].append((k, leaders))
+        return team
+
+    def leaders(self, bmap):
+        """Return the (player, count) pairs of a {player: count} map, highest to lowest"""
+        return sorted(bmap.items(), reverse=True, key=lambda item: item[1])
+
+    @staticmethod
+    def format_leaders(leaders):
+        """Format a list of (player, count) as Player Name (n), Player Name (n)"""
+        return ", ".join("%s (%d)"%(player, value) for player, value in leaders)
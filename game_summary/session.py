@@ -0,0 +1,148 @@
+import sys
+import time
+import threading
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+
+
+"""
+A shared HTTP session for all requests made by game-summary.
+
+The session keeps a pool of connections open (so we only pay
+for the TLS handshake once per host), puts a timeout on every
+request, and retries requests that fail with a 429 or 5xx
+status code using exponential backoff. If the server sends a
+Retry-After header, we wait that long instead.
+"""
+
+
+class ApiSession(object):
+    """
+    Wrap a requests.Session with timeouts, retries, and
+    counters for how many requests were made and retried.
+    """
+    DEFAULT_CONNECT_TIMEOUT = 5
+    DEFAULT_READ_TIMEOUT = 30
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF = 0.5
+    DEFAULT_POOL_SIZE = 10
+    # Never wait longer than this between retries, in seconds
+    MAX_BACKOFF = 60
+    # Status codes that are worth retrying
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+
+    def __init__(self,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF,
+                 pool_size=DEFAULT_POOL_SIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Counters (requests may be made from several threads)
+        self._lock = threading.Lock()
+        self.n_requests = 0
+        self.n_retried = 0
+        self.n_retries = 0
+        self.n_failed = 0
+
+    def get(self, url, **kwargs):
+        """
+        Make a GET request, retrying on connection errors, timeouts,
+        and retryable status codes. Returns the last response.
+        Raises a requests exception if every attempt failed to connect.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        self._count('n_requests')
+        for attempt in range(self.retries+1):
+            last_attempt = (attempt==self.retries)
+            try:
+                resp = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    self._count('n_failed')
+                    raise
+                wait = self._backoff(attempt)
+            else:
+                if resp.status_code not in self.RETRY_STATUS or last_attempt:
+                    if resp.status_code in self.RETRY_STATUS:
+                        self._count('n_failed')
+                    return resp
+                wait = self._retry_after(resp)
+                if wait is None:
+                    wait = self._backoff(attempt)
+                resp.close()
+
+            if attempt==0:
+                self._count('n_retried')
+            self._count('n_retries')
+            time.sleep(wait)
+
+    def stats(self):
+        """Return a dict of request counters"""
+        with self._lock:
+            return dict(
+                requests = self.n_requests,
+                retried = self.n_retried,
+                retries = self.n_retries,
+                failed = self.n_failed
+            )
+
+    def print_stats(self, file=sys.stderr):
+        s = self.stats()
+        print("HTTP requests: %d, retried: %d (%d retries total), failed: %d"%(
+            s['requests'], s['retried'], s['retries'], s['failed']
+        ), file=file)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _backoff(self, attempt):
+        return min(self.MAX_BACKOFF, self.backoff * (2**attempt))
+
+    def _retry_after(self, resp):
+        """
+        Return the number of seconds the Retry-After header asks us
+        to wait, or None if there is no (valid) Retry-After header
+        """
+        value = resp.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            # Number of seconds
+            wait = float(value)
+        except ValueError:
+            # HTTP date
+            try:
+                when = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            wait = when.timestamp() - time.time()
+        return min(self.MAX_BACKOFF, max(0, wait))
+
+
+# The session shared by the whole package
+_session = None
+
+
+def get_session():
+    """Get the shared ApiSession, creating one with default settings if needed"""
+    global _session
+    if _session is None:
+        _session = ApiSession()
+    return _session
+
+
+def set_session(session):
+    """Replace the shared ApiSession"""
+    global _session
+    _session = session
@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import copy
+import hashlib
+from .sources import get_source
+from .batch import summarize_many, DEFAULT_WORKERS, DEFAULT_CHUNK_SIZE
+from .view import MarkdownView, game_error_message
+from .ingest import MAX_DAY
+from .util import ApiError
+
+
+"""
+Build a static site of markdown pages for a season of games:
+
+    index.md                the days and teams of the season
+    days/day-<N>.md         the games of each day
+    teams/<team>.md         the games of each team
+    games/<game_id>.md      the game summary of each game (MarkdownView)
+    manifest.json           what each page was built from
+
+The manifest keeps a hash of the game data of each game, along with
+what the index pages need to know about it (day, teams, and score).
+Building the site again only fetches, parses, and renders the games
+that are new or whose game data changed (like games that were still
+being played), and only rewrites the day and team pages those games
+are on. The index pages are made from the manifest, so the games that
+did not change are never summarized again.
+"""
+
+
+# Version of the layout of the pages and the manifest,
+# bumped when it changes (which rebuilds the whole site)
+SITE_VERSION = 2
+
+
+def game_hash(game_full):
+    """Return a hash of the raw game JSON, to tell when a game has changed"""
+    return hashlib.sha256(json.dumps(game_full, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def team_slug(team_name):
+    """Return the file name of the page of a team"""
+    return re.sub(r'[^a-z0-9]+', '-', team_name.lower()).strip('-')
+
+
+class Site(object):
+    """
+    A static site of game summaries for one season, in directory path
+    (season is 1-indexed, like in game summaries)
+    """
+    def __init__(self, path, season, options, log=print):
+        self.path = path
+        self.season = season
+        self.options = options
+        self.log = log
+        self.manifest_path = os.path.join(path, 'manifest.json')
+        self.games = self.load_manifest()
+
+    def settings(self):
+        """Everything besides the game data that changes what the pages look like"""
+        return dict(
+            version = SITE_VERSION,
+            season = self.season,
+            no_name_lookup = getattr(self.options, 'no_name_lookup', False)
+        )
+
+    def load_manifest(self):
+        """
+        Return the games in the manifest, by game ID (or nothing if
+        there is no manifest). If the site was built with other
+        settings, every game is rebuilt the next time it is built.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        games = manifest['games']
+        if manifest.get('settings')!=self.settings():
+            self.invalidate(games)
+        return games
+
+    def invalidate(self, games=None):
+        """
+        Forget the hashes of games in the manifest (all of them, by
+        default), so they are rebuilt the next time they are built.
+        The games stay on the index pages until then.
+        """
+        for entry in (self.games if games is None else games).values():
+            entry['hash'] = None
+
+    def save_manifest(self):
+        manifest = dict(settings=self.settings(), games=self.games)
+        self.write('manifest.json', json.dumps(manifest, indent=1, sort_keys=True))
+
+    def write(self, relpath, text):
+        """Write a page in one go, replacing the old one only once it is all written"""
+        path = os.path.join(self.path, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+    def list_games(self, day_start=0, day_end=None):
+        """
+        Return the raw game JSON of every game in the season from
+        day_start to day_end (0-indexed, inclusive), in order. If
+        day_end is None, keep going until a day has no games.
+        """
+        source = get_source()
+        games = []
+        day = day_start
+        while day_end is None or day <= day_end:
+            if day > MAX_DAY:
+                break
+            day_games = source.get_games_by_day(self.season-1, day)
+            if len(day_games)==0 and day_end is None:
+                break
+            games += day_games
+            day += 1
+        return games
+
+    def build(self, day_start=0, day_end=None, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Bring the site up to date with the games from day_start to
+        day_end (0-indexed, inclusive). Returns the number of games
+        that were summarized again.
+        """
+        games = self.list_games(day_start, day_end)
+        hashes = {game['id']: game_hash(game) for game in games}
+        changed = [
+            game for game in games
+            if game['id'] not in self.games
+            or self.games[game['id']]['hash']!=hashes[game['id']]
+            or (
+                not os.path.exists(os.path.join(self.path, 'games', game['id'] + '.md'))
+                and self.games[game['id']]['error'] is None
+            )
+        ]
+
+        # Days and teams whose pages list a changed game
+        touched_days = set()
+        touched_teams = set()
+        for game in changed:
+            old = self.games.get(game['id'])
+            if old is not None:
+                touched_days.add(old['day'])
+                touched_teams.update([old['away'], old['home']])
+
+        options = copy.copy(self.options)
+        options.box_only = False
+        options.line_only = False
+        by_id = {game['id']: game for game in changed}
+        n_built = 0
+        for game_id, summary in summarize_many(
+            [game['id'] for game in changed],
+            options,
+            workers=workers,
+            chunk_size=chunk_size,
+            games=by_id
+        ):
+            if isinstance(summary, ApiError):
+                # Try this game again next time
+                self.log(game_error_message(game_id, summary))
+                continue
+            game = by_id[game_id]
+            entry = dict(
+                hash = hashes[game_id],
+                day = game['day']+1,
+                away = game['awayTeamName'],
+                home = game['homeTeamName'],
+                away_score = game['awayScore'],
+                home_score = game['homeScore'],
+                error = None
+            )
+            page_path = os.path.join(self.path, 'games', game_id + '.md')
+            if isinstance(summary, Exception):
+                entry['error'] = game_error_message(game_id, summary)
+                self.log(entry['error'])
+                if os.path.exists(page_path):
+                    os.remove(page_path)
+            else:
+                self.write(os.path.join('games', game_id + '.md'), self.game_page(options, game_id, summary, entry))
+            self.games[game_id] = entry
+            touched_days.add(entry['day'])
+            touched_teams.update([entry['away'], entry['home']])
+            n_built += 1
+
+        for day in sorted(touched_days):
+            self.write(os.path.join('days', 'day-%d.md'%(day)), self.day_page(day))
+        for team_name in sorted(touched_teams):
+            self.write(os.path.join('teams', team_slug(team_name) + '.md'), self.team_page(team_name))
+        if n_built > 0 or not os.path.exists(os.path.join(self.path, 'index.md')):
+            self.write('index.md', self.index_page())
+        self.save_manifest()
+        self.log("Season %d: %d games, %d summarized, %d day pages and %d team pages written"%(
+            self.season, len(games), n_built, len(touched_days), len(touched_teams)
+        ))
+        return n_built
+
+    def sorted_games(self, games):
+        """Return (game_id, entry) pairs of manifest games, by day, then away team"""
+        return sorted(games.items(), key=lambda item: (item[1]['day'], item[1]['away'], item[0]))
+
+    def game_link(self, game_id, entry, text):
+        """Return a link to the page of a game from a day or team page, or just the text if it has none"""
+        if entry['error'] is not None:
+            return "%s (no summary)"%(text)
+        return "[%s](../games/%s.md)"%(text, game_id)
+
+    def game_page(self, options, game_id, summary, entry):
+        options.game_id = game_id
+        lines = [
+            "[Season %d](../index.md) / [Day %d](../days/day-%d.md)"%(self.season, entry['day'], entry['day']),
+            "",
+            MarkdownView(options, json_game_data=summary).render()
+        ]
+        return "\n".join(lines)
+
+    def day_page(self, day):
+        games = {k: v for k, v in self.games.items() if v['day']==day}
+        lines = [
+            "[Season %d](../index.md)"%(self.season),
+            "",
+            "# Season %d, Day %d"%(self.season, day),
+            "",
+            "| Game | Score |",
+            "| --- | --- |",
+        ]
+        for game_id, entry in self.sorted_games(games):
+            lines.append("| %s | %d - %d |"%(
+                self.game_link(game_id, entry, "%s @ %s"%(entry['away'], entry['home'])),
+                entry['away_score'],
+                entry['home_score']
+            ))
+        return "\n".join(lines) + "\n"
+
+    def team_page(self, team_name):
+        games = {k: v for k, v in self.games.items() if team_name in [v['away'], v['home']]}
+        lines = [
+            "[Season %d](../index.md)"%(self.season),
+            "",
+            "# %s, Season %d"%(team_name, self.season),
+            "",
+            "| Day | Opponent | Score | Result |",
+            "| --- | --- | --- | --- |",
+        ]
+        for game_id, entry in self.sorted_games(games):
+            if entry['home']==team_name:
+                opponent = "vs %s"%(entry['away'])
+                runs, runs_against = entry['home_score'], entry['away_score']
+            else:
+                opponent = "@ %s"%(entry['home'])
+                runs, runs_against = entry['away_score'], entry['home_score']
+            result = 'W' if runs > runs_against else 'L' if runs < runs_against else '-'
+            lines.append("| [Day %d](../days/day-%d.md) | %s | %s | %s |"%(
+                entry['day'],
+                entry['day'],
+                opponent,
+                self.game_link(game_id, entry, "%d - %d"%(runs, runs_against)),
+                result
+            ))
+        return "\n".join(lines) + "\n"
+
+    def index_page(self):
+        days = {}
+        teams = {}
+        for entry in self.games.values():
+            days[entry['day']] = days.get(entry['day'], 0) + 1
+            for team_name in [entry['away'], entry['home']]:
+                teams[team_name] = teams.get(team_name, 0) + 1
+        lines = [
+            "# Season %d"%(self.season),
+            "",
+            "## Days",
+            "",
+        ]
+        for day in sorted(days):
+            lines.append("* [Day %d](days/day-%d.md) (%d games)"%(day, day, days[day]))
+        lines += [
+            "",
+            "## Teams",
+            "",
+        ]
+        for team_name in sorted(teams):
+            lines.append("* [%s](teams/%s.md) (%d games)"%(team_name, team_slug(team_name), teams[team_name]))
+        return "\n".join(lines) + "\n"
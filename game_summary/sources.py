@@ -0,0 +1,605 @@
+import os
+import json
+import itertools
+import gzip
+import sqlite3
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from .session import get_session
+from .jsonstream import iter_array_items, iter_file_chunks, CHUNK_SIZE
+from .util import NoMatchingGames, NoMatchingEntity, ApiError
+
+
+"""
+Data sources provide the raw data that the RawGameData,
+RawEventData, and EntityData classes (see data_raw.py) wrap:
+
+- HttpSource: the live blaseball.com and blaseball-reference.com APIs
+- DirectorySource: a local directory of JSON/JSONL dumps
+- SqliteSource: a local SQLite archive
+
+Every data source returns data in the same shape as the APIs do:
+
+- get_game(game_id): the gameById JSON for one game
+- get_events(game_id): the events JSON for one game
+  (a dict with a 'count' and a 'results' list of events)
+- iter_events(game_id, start=0): the same events, one at a time,
+  without holding the whole list in memory where the source allows
+  it, starting from event number start (to pick up where an earlier
+  call left off, for a game in progress)
+- get_player_names(player_ids): a dict of player ID to player name
+- get_team(team_id): the team JSON for one team
+
+The data source used by the data_raw classes is set with set_source().
+"""
+
+
+def is_game_finished(game_full):
+    """Return True if the raw game JSON is for a game that is over"""
+    return bool(game_full.get('gameComplete', False) or game_full.get('finalized', False))
+
+
+def is_events_finished(events_json):
+    """Return True if the raw events JSON includes the last event of the game"""
+    return any(event.get('is_last_game_event', False) for event in events_json['results'])
+
+
+class DataSource(object):
+    """
+    Base class for all data sources
+    """
+    # Max number of player IDs to look up at once
+    PLAYER_CHUNK_SIZE = 50
+    # Does the data come from local files, with no network access
+    LOCAL = False
+
+    def get_game(self, game_id):
+        raise NotImplementedError()
+
+    def get_games_by_day(self, season, day):
+        raise NotImplementedError()
+
+    def get_events(self, game_id):
+        raise NotImplementedError()
+
+    def iter_events(self, game_id, start=0):
+        for event in itertools.islice(self.get_events(game_id)['results'], start, None):
+            yield event
+
+    def get_player_names(self, player_ids):
+        raise NotImplementedError()
+
+    def get_team(self, team_id):
+        raise NotImplementedError()
+
+
+class HttpSource(DataSource):
+    """
+    Get data from the live APIs, using the shared HTTP session
+    (see session.py) and an optional ResponseCache (see cache.py).
+    """
+    GAME_ENDPOINT = "https://www.blaseball.com/database/gameById/"
+    GAMES_ENDPOINT = "https://www.blaseball.com/database/games?season=%d&day=%d"
+    EVENTS_ENDPOINT = "https://api.blaseball-reference.com/v1/events?gameId="
+    TEAM_ENDPOINT = "https://www.blaseball.com/database/team?ids="
+    PLAYER_ENDPOINT = "https://www.blaseball.com/database/players?ids="
+
+    # The events API returns at most this many events per request,
+    # starting from the given offset
+    EVENTS_LIMIT_PARAM = "limit"
+    EVENTS_OFFSET_PARAM = "offset"
+    # Paging is off by default (all events in one request): the names
+    # of the paging parameters above have not been checked against
+    # the events API yet
+    DEFAULT_PAGE_SIZE = 0
+
+    def __init__(self, cache=None, page_size=DEFAULT_PAGE_SIZE):
+        self.cache = cache
+        # Number of events to request at once (0 to get all events in one request)
+        self.page_size = page_size
+
+    def get_game(self, game_id):
+        url = self.GAME_ENDPOINT + game_id
+        game_full = self._cache_get(url)
+        if game_full is None:
+            resp = self._get(url)
+            if resp.status_code != 200:
+                raise ApiError()
+            try:
+                game_full = resp.json()
+            except json.JSONDecodeError:
+                raise NoMatchingGames()
+            # Finished games never change, so keep them forever
+            self._cache_set(url, game_full, permanent=is_game_finished(game_full))
+        return game_full
+
+    def get_games_by_day(self, season, day):
+        """
+        Get the gameById JSON for every game on one day of a season
+        (season and day are 0-indexed, as in the API)
+        """
+        url = self.GAMES_ENDPOINT%(season, day)
+        games = self._cache_get(url)
+        if games is None:
+            resp = self._get(url)
+            if resp.status_code != 200:
+                raise ApiError()
+            try:
+                games = resp.json()
+            except json.JSONDecodeError:
+                raise NoMatchingGames()
+            finished = len(games) > 0 and all(is_game_finished(game) for game in games)
+            self._cache_set(url, games, permanent=finished)
+        return games
+
+    def get_events(self, game_id):
+        url = self.EVENTS_ENDPOINT + game_id
+        events_json = self._cache_get(url)
+        if events_json is None:
+            resp = self._get(url)
+            if resp.status_code != 200:
+                raise ApiError()
+            try:
+                events_json = resp.json()
+            except json.JSONDecodeError:
+                raise NoMatchingGames()
+            if len(events_json)==0:
+                raise NoMatchingGames()
+            # Once the last event of the game is in, the events never change
+            self._cache_set(url, events_json, permanent=is_events_finished(events_json))
+        return events_json
+
+    def iter_events(self, game_id, start=0):
+        """
+        Get the events one page at a time, decoding each page while
+        the next page is downloaded in the background. If paging is
+        turned off, decode the single events response incrementally
+        as it comes in instead (asking for the events from start on,
+        for a game in progress, see _iter_events_from()).
+        """
+        if self.page_size > 0:
+            return self._iter_event_pages(game_id, start)
+        if start > 0:
+            return self._iter_events_from(game_id, start)
+        return self._iter_event_stream(self.EVENTS_ENDPOINT + game_id)
+
+    def _iter_events_from(self, game_id, start):
+        """
+        Get the events from event number start on, in one request with
+        start as the offset, so following a game or resuming it only
+        downloads the events it has not seen. If the events API ignores
+        the offset and sends every event, skip the events before start.
+        """
+        url = "%s%s&%s=%d"%(self.EVENTS_ENDPOINT, game_id, self.EVENTS_OFFSET_PARAM, start)
+        events = self._iter_event_stream(url)
+        first = next(events, None)
+        if first is None:
+            return
+        first_index = first.get('event_index', 0)
+        if first_index==start:
+            yield first
+        elif first_index==0:
+            events = itertools.islice(events, start-1, None)
+        else:
+            raise ApiError(
+                "Events API returned events starting at event %s instead of %d for game id %s"%(
+                    first_index, start, game_id
+                )
+            )
+        for event in events:
+            yield event
+
+    def _iter_event_pages(self, game_id, start=0):
+        # The count of all events in the game comes with every page,
+        # and is used to plan which pages are left
+        info = {}
+        executor = ThreadPoolExecutor(max_workers=1)
+        offset = start
+        future = executor.submit(self._get_events_page, game_id, offset)
+        try:
+            while future is not None:
+                url, body, from_cache = future.result()
+                future = None
+                next_offset = None
+                n = 0
+                finished = False
+                try:
+                    for event in iter_array_items([body], on_value=info.__setitem__):
+                        if n==0:
+                            # If the API ignores the offset, every page
+                            # would be the first page over again
+                            if event.get('event_index')!=offset:
+                                raise ApiError(
+                                    "Events API returned a page starting at event %s instead of %d for game id %s (use --page-size 0)"%(
+                                        event.get('event_index'), offset, game_id
+                                    )
+                                )
+                            # Start on the next page as soon as we can
+                            next_offset = self._next_page_offset(offset, n, info.get('count'))
+                            if next_offset is not None:
+                                future = executor.submit(self._get_events_page, game_id, next_offset)
+                        n += 1
+                        if n > self.page_size:
+                            # This API is not paging, so there are no more pages
+                            if future is not None:
+                                future.cancel()
+                                future = None
+                        if event.get('is_last_game_event', False):
+                            finished = True
+                        yield event
+                except json.JSONDecodeError:
+                    raise NoMatchingGames()
+
+                if future is None and n <= self.page_size:
+                    next_offset = self._next_page_offset(offset, n, info.get('count'))
+                    if next_offset is not None:
+                        future = executor.submit(self._get_events_page, game_id, next_offset)
+                offset = next_offset
+
+                # Full pages never change, and neither does the
+                # page with the last event of the game
+                if not from_cache:
+                    self._cache_set_body(url, body, permanent=(n==self.page_size or finished))
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _next_page_offset(self, offset, n, count):
+        """
+        Return the offset of the page after the page at the given offset,
+        or None if there are no more pages. n is the number of events
+        seen on this page so far, count is the total number of events.
+        """
+        if count is not None:
+            next_offset = offset + self.page_size
+            return next_offset if next_offset < count else None
+        # Without a count, keep going until a page comes back short
+        if n==self.page_size:
+            return offset + n
+        return None
+
+    def _get_events_page(self, game_id, offset):
+        """Get the raw body of one page of events, and whether it came from the cache"""
+        url = "%s%s&%s=%d&%s=%d"%(
+            self.EVENTS_ENDPOINT, game_id,
+            self.EVENTS_LIMIT_PARAM, self.page_size,
+            self.EVENTS_OFFSET_PARAM, offset
+        )
+        if self.cache is not None:
+            f = self.cache.open(url)
+            if f is not None:
+                with f:
+                    return url, f.read(), True
+        resp = self._get(url)
+        if resp.status_code != 200:
+            raise ApiError()
+        return url, resp.content, False
+
+    def _iter_event_stream(self, url):
+        """
+        Decode the events response from url incrementally as it comes
+        in (or as it is read back from the cache), one event at a time
+        """
+        if self.cache is not None:
+            f = self.cache.open(url)
+            if f is not None:
+                with f:
+                    for event in iter_array_items(iter_file_chunks(f)):
+                        yield event
+                return
+
+        resp = self._get(url, stream=True)
+        try:
+            if resp.status_code != 200:
+                raise ApiError()
+            chunks = resp.iter_content(chunk_size=CHUNK_SIZE)
+            # Once the last event of the game is in, the events never change
+            finished = [False]
+            if self.cache is not None:
+                chunks = self.cache.tee(url, chunks, lambda: finished[0])
+            try:
+                for event in iter_array_items(chunks):
+                    if event.get('is_last_game_event', False):
+                        finished[0] = True
+                    yield event
+            except json.JSONDecodeError:
+                raise NoMatchingGames()
+            except requests.exceptions.RequestException:
+                raise ApiError()
+        finally:
+            resp.close()
+
+    def get_player_names(self, player_ids):
+        player_names = {}
+        player_ids = list(player_ids)
+        for i in range(0, len(player_ids), self.PLAYER_CHUNK_SIZE):
+            chunk = player_ids[i:i+self.PLAYER_CHUNK_SIZE]
+            url = self.PLAYER_ENDPOINT + ",".join(chunk)
+            players_full = self._cache_get(url)
+            if players_full is None:
+                resp = self._get(url)
+                if resp.status_code != 200:
+                    # Leave these out, caller decides what to do
+                    continue
+                try:
+                    players_full = resp.json()
+                except json.JSONDecodeError:
+                    raise NoMatchingEntity()
+                self._cache_set(url, players_full)
+            for player in players_full:
+                player_names[player['id']] = player['name']
+        return player_names
+
+    def get_team(self, team_id):
+        url = self.TEAM_ENDPOINT + team_id
+        team_full = self._cache_get(url)
+        if team_full is None:
+            resp = self._get(url)
+            if resp.status_code != 200:
+                raise ApiError()
+            try:
+                team_full = resp.json()
+            except json.JSONDecodeError:
+                raise NoMatchingEntity()
+            self._cache_set(url, team_full)
+        return team_full
+
+    def _get(self, url, **kwargs):
+        try:
+            return get_session().get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            raise ApiError()
+
+    def _cache_get(self, url):
+        if self.cache is None:
+            return None
+        return self.cache.get(url)
+
+    def _cache_set(self, url, data, permanent=False):
+        if self.cache is not None:
+            self.cache.set(url, data, permanent=permanent)
+
+    def _cache_set_body(self, url, body, permanent=False):
+        if self.cache is not None:
+            self.cache.set_body(url, body, permanent=permanent)
+
+
+class DirectorySource(DataSource):
+    """
+    Get data from a local directory of dumps, laid out like this
+    (any file may also be gzipped, with a .gz suffix added):
+
+    games/<game_id>.json    gameById JSON
+    events/<game_id>.json   events JSON ({"count": N, "results": [...]})
+    events/<game_id>.jsonl  or, one event JSON per line
+    players.json            {player_id: player_name}, or a list of player JSON
+    teams.json              {team_id: team JSON}, or a list of team JSON
+    """
+    LOCAL = True
+
+    def __init__(self, path):
+        if not os.path.isdir(path):
+            raise FileNotFoundError("Missing data source directory: %s"%(path))
+        self.path = path
+        self._players = None
+        self._teams = None
+        self._days = None
+
+    def get_game(self, game_id):
+        game_full = self._load(os.path.join('games', game_id + '.json'))
+        if game_full is None:
+            raise NoMatchingGames()
+        return game_full
+
+    def get_games_by_day(self, season, day):
+        if self._days is None:
+            # Read every game once, to find the games of each day
+            self._days = {}
+            games_path = os.path.join(self.path, 'games')
+            if os.path.isdir(games_path):
+                # (a game may be gzipped, so go by the game IDs)
+                game_ids = sorted(set(filename.split('.')[0] for filename in os.listdir(games_path)))
+                for game_id in game_ids:
+                    game_full = self._load(os.path.join('games', game_id + '.json'))
+                    if game_full is not None:
+                        key = (game_full['season'], game_full['day'])
+                        self._days.setdefault(key, []).append(game_full)
+        return self._days.get((season, day), [])
+
+    def get_events(self, game_id):
+        events_json = self._load(os.path.join('events', game_id + '.json'))
+        if events_json is None:
+            results = self._load_lines(os.path.join('events', game_id + '.jsonl'))
+            if results is None:
+                raise NoMatchingGames()
+            events_json = dict(count=len(results), results=results)
+        if len(events_json['results'])==0:
+            raise NoMatchingGames()
+        return events_json
+
+    def iter_events(self, game_id, start=0):
+        f = self._open(os.path.join('events', game_id + '.json'))
+        if f is not None:
+            with f:
+                for event in itertools.islice(iter_array_items(iter_file_chunks(f)), start, None):
+                    yield event
+            return
+        f = self._open(os.path.join('events', game_id + '.jsonl'))
+        if f is None:
+            raise NoMatchingGames()
+        with f:
+            lines = (line for line in f if line.strip())
+            for line in itertools.islice(lines, start, None):
+                yield json.loads(line)
+
+    def get_player_names(self, player_ids):
+        if self._players is None:
+            self._players = self._load_id_map('players.json', lambda player: player['name'])
+        return {
+            player_id: self._players[player_id]
+            for player_id in player_ids
+            if player_id in self._players
+        }
+
+    def get_team(self, team_id):
+        if self._teams is None:
+            self._teams = self._load_id_map('teams.json', lambda team: team)
+        if team_id not in self._teams:
+            raise NoMatchingEntity()
+        return self._teams[team_id]
+
+    def _open(self, relpath):
+        """Open a file, or its gzipped version, or return None if neither exists"""
+        path = os.path.join(self.path, relpath)
+        if os.path.exists(path):
+            return open(path, 'rt', encoding='utf-8')
+        elif os.path.exists(path + '.gz'):
+            return gzip.open(path + '.gz', 'rt', encoding='utf-8')
+        return None
+
+    def _load(self, relpath):
+        f = self._open(relpath)
+        if f is None:
+            return None
+        with f:
+            return json.load(f)
+
+    def _load_lines(self, relpath):
+        f = self._open(relpath)
+        if f is None:
+            return None
+        with f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _load_id_map(self, relpath, value):
+        """Load a {id: value} map, or a list of JSON objects with an 'id' key"""
+        data = self._load(relpath)
+        if data is None:
+            return {}
+        if isinstance(data, list):
+            return {item['id']: value(item) for item in data}
+        return data
+
+
+class SqliteSource(DataSource):
+    """
+    Get data from a local SQLite archive. Game, event, and team JSON
+    are stored as text, exactly as the APIs return them.
+    """
+    LOCAL = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS games (
+        id TEXT PRIMARY KEY,
+        season INTEGER,
+        day INTEGER,
+        home_team TEXT,
+        away_team TEXT,
+        finished INTEGER NOT NULL DEFAULT 0,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS events (
+        game_id TEXT NOT NULL,
+        event_index INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (game_id, event_index)
+    );
+    CREATE TABLE IF NOT EXISTS players (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS teams (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError("Missing data source database: %s"%(path))
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    def get_game(self, game_id):
+        row = self.conn.execute("SELECT data FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None:
+            raise NoMatchingGames()
+        return json.loads(row[0])
+
+    def get_games_by_day(self, season, day):
+        rows = self.conn.execute(
+            "SELECT data FROM games WHERE season = ? AND day = ? ORDER BY rowid",
+            (season, day)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_events(self, game_id):
+        rows = self.conn.execute(
+            "SELECT data FROM events WHERE game_id = ? ORDER BY event_index",
+            (game_id,)
+        ).fetchall()
+        if len(rows)==0:
+            raise NoMatchingGames()
+        results = [json.loads(row[0]) for row in rows]
+        return dict(count=len(results), results=results)
+
+    def iter_events(self, game_id, start=0):
+        cursor = self.conn.execute(
+            "SELECT data FROM events WHERE game_id = ? AND event_index >= ? ORDER BY event_index",
+            (game_id, start)
+        )
+        for row in cursor:
+            yield json.loads(row[0])
+
+    def get_player_names(self, player_ids):
+        player_ids = list(player_ids)
+        player_names = {}
+        # Stay under SQLite's limit on the number of query parameters
+        for i in range(0, len(player_ids), self.PLAYER_CHUNK_SIZE):
+            chunk = player_ids[i:i+self.PLAYER_CHUNK_SIZE]
+            query = "SELECT id, name FROM players WHERE id IN (%s)"%(",".join("?"*len(chunk)))
+            for player_id, name in self.conn.execute(query, chunk):
+                player_names[player_id] = name
+        return player_names
+
+    def get_team(self, team_id):
+        row = self.conn.execute("SELECT data FROM teams WHERE id = ?", (team_id,)).fetchone()
+        if row is None:
+            raise NoMatchingEntity()
+        return json.loads(row[0])
+
+
+# Names of data sources, for the --source command line flag
+SOURCES = ['http', 'dir', 'sqlite']
+
+
+def make_source(name, path=None, cache=None, page_size=HttpSource.DEFAULT_PAGE_SIZE):
+    """Create a data source from its name (see SOURCES)"""
+    if name=='http':
+        return HttpSource(cache=cache, page_size=page_size)
+    if path is None:
+        raise ValueError("The %s data source requires a path"%(name))
+    if name=='dir':
+        return DirectorySource(path)
+    elif name=='sqlite':
+        return SqliteSource(path)
+    raise ValueError("Unrecognized data source: %s"%(name))
+
+
+# The data source used by the data_raw classes
+_source = None
+
+
+def get_source():
+    """Get the current data source, defaulting to the live APIs"""
+    global _source
+    if _source is None:
+        _source = HttpSource()
+    return _source
+
+
+def set_source(source):
+    """Replace the current data source"""
+    global _source
+    _source = source
@@ -0,0 +1,80 @@
+import re
+
+
+"""
+Search the text of events for keywords (weather events) and
+for the names of baserunners, with regular expressions that are
+compiled once for each list of keywords and names.
+
+The text of an event is searched as one string, with its lines
+joined by newlines, so most events (those with no keywords) are
+ruled out without looking at each line. For a long list of keywords,
+all the keywords are combined into one pattern, so ruling an event
+out takes a single search, however many keywords there are. For a
+short list (like the weather words), looking for each keyword with
+`in` is quicker than the pattern.
+
+    matcher = get_matcher(['blooddrain', 'incinerate'], {'SB': r'^(.*) steals'})
+    text = "\\n".join(event['event_text'])
+    matcher.keyword_lines(text, event['event_text'])
+    matcher.find_name('SB', text)
+"""
+
+
+class TextMatcher(object):
+    """
+    Finds lines with keywords, and names of players, in event text
+    """
+    # Use one combined pattern for at least this many keywords
+    MIN_REGEX_KEYWORDS = 16
+
+    def __init__(self, keywords, name_patterns):
+        self.keywords = list(keywords)
+        if len(self.keywords) >= self.MIN_REGEX_KEYWORDS:
+            self.keyword_regex = re.compile("|".join(re.escape(k) for k in self.keywords))
+        else:
+            self.keyword_regex = None
+        # ^ and $ match at the start and end of each line of the text
+        self.name_regexes = {
+            kind: re.compile(pattern, re.MULTILINE)
+            for kind, pattern in name_patterns.items()
+        }
+
+    def keyword_lines(self, text, lines):
+        """
+        Return the lines of an event that have a keyword in them, in
+        the order of the keywords, then of the lines. (A line with two
+        keywords is returned twice.) text is the lines joined by newlines.
+        """
+        if self.keyword_regex is not None:
+            if self.keyword_regex.search(text) is None:
+                return []
+        else:
+            for k in self.keywords:
+                if k in text:
+                    break
+            else:
+                return []
+        return [line for k in self.keywords for line in lines if k in line]
+
+    def find_name(self, kind, text):
+        """
+        Return the name in the first line of text that matches the
+        name pattern of this kind (its first group), or None
+        """
+        m = self.name_regexes[kind].search(text)
+        if m is None:
+            return None
+        return m.group(1)
+
+
+# Matchers already built, by keywords and name patterns
+_matchers = {}
+
+
+def get_matcher(keywords, name_patterns):
+    """Get the TextMatcher for these keywords and name patterns, building it the first time"""
+    key = (tuple(keywords), tuple(sorted(name_patterns.items())))
+    if key not in _matchers:
+        _matchers[key] = TextMatcher(keywords, name_patterns)
+    return _matchers[key]
@@ -17,6 +17,18 @@ FULL_DALE_SAFE = "Miami Dale"
 FULL_DALE_UTF8 = "Miami Dal\u00e9"
 
 
+class NoMatchingGames(Exception):
+    pass
+
+
+class NoMatchingEntity(Exception):
+    pass
+
+
+class ApiError(Exception):
+    pass
+
+
 class TieGameException(Exception):
     pass
 
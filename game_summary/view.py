@@ -1,9 +1,11 @@
+import io
 import sys
 import json
 from rich.console import Console
 from rich.table import Table
 from .util import TieGameException, GameParsingError
-from .data_model import GameSummaryData
+from .data_model import GameSummary
+from .presentation import Presentation
 from .data_raw import NoMatchingGames, ApiError
 
 
@@ -23,90 +25,135 @@ class BaseView(object):
     it for viewing. The parsing functions are common to all
     View classes.
     """
-    def __init__(self, options):
+    def __init__(self, options, json_game_data=None, presentation=None):
         """
-        Get all of the game summary data here.
+        Get all of the game summary data here, unless the
+        game summary JSON is passed in already.
 
         Game data is stored in a dictionary - key is game ID,
         value is the game summary JSON object.
+
+        The presentation of the game summary (see presentation.py)
+        can be passed in too, when it is shown in several views.
         """
         self.game_id = options.game_id
         self.box_only = options.box_only
         self.line_only = options.line_only
+        self._presentation = presentation
+        if json_game_data is not None:
+            self.json_game_data = json_game_data
+            return
         try:
-            gsd = GameSummaryData(self.game_id, options)
-            self.json_game_data = gsd.get_json()
-        except NoMatchingGames as e:
-            print(f"No matching games found for game id {self.game_id}. Try using blaseball-game-finder to look for game IDs.")
-            sys.exit(1)
-        except ApiError as e:
-            print(f"Error reaching API for game id {self.game_id}, check log for details")
-            sys.exit(1)
-        except TieGameException as e:
-            print(f"Error with game id {self.game_id}, that game ended in a tie")
-            sys.exit(0)
-        except GameParsingError as e:
-            print(f"Error parsing events of game id {self.game_id}, use blaseball-game-dump to check the event log for errors")
-            sys.exit(1)
+            summary = GameSummary(self.game_id, options)
+            self.json_game_data = summary.get_json()
+        except (NoMatchingGames, ApiError, TieGameException, GameParsingError) as e:
+            print(game_error_message(self.game_id, e))
+            sys.exit(0 if isinstance(e, TieGameException) else 1)
+
+    @property
+    def presentation(self):
+        """The presentation of the game summary, worked out the first time it is needed"""
+        if self._presentation is None:
+            self._presentation = Presentation(self.json_game_data)
+        return self._presentation
+
+    def render(self):
+        """Return the game summary, formatted by this view, as a string"""
+        raise NotImplementedError()
+
+    def show(self):
+        """Print the game summary, formatted by this view"""
+        sys.stdout.write(self.render())
+
+
+def game_error_message(game_id, e):
+    """Return the message to show when a game could not be summarized because of exception e"""
+    if isinstance(e, NoMatchingGames):
+        return f"No matching games found for game id {game_id}. Try using blaseball-game-finder to look for game IDs."
+    elif isinstance(e, ApiError):
+        return f"Error reaching API for game id {game_id}, check log for details"
+    elif isinstance(e, TieGameException):
+        return f"Error with game id {game_id}, that game ended in a tie"
+    elif isinstance(e, GameParsingError):
+        return f"Error parsing events of game id {game_id}, use blaseball-game-dump to check the event log for errors"
+    return f"Error with game id {game_id}: {e!r}"
+
 
 class JsonView(BaseView):
     """
     The simplest view class, this passes the game summary JSON
     straight through to the user
     """
+    def render(self):
+        return json.dumps(self.json_game_data, indent=4) + "\n"
+
+
+class JsonLinesView(JsonView):
+    """
+    Passes the game summary JSON through as one compact line,
+    flushed right away, so that a stream of game summaries can
+    be read line by line as each game is summarized
+    """
+    def render(self):
+        return json.dumps(self.json_game_data, separators=(',', ':')) + "\n"
+
     def show(self):
-        print(json.dumps(self.json_game_data, indent=4))
+        sys.stdout.write(self.render())
+        sys.stdout.flush()
 
 
 class TextView(BaseView):
     """
     Print a game summary in plain text format
     """
-    def show(self):
+    def render(self):
         d = self.json_game_data
+        out = []
 
         # ---------------
         # game info
-        print("")
-        print("\n".join(self.text_info_header()))
-        print("")
+        out.append("")
+        out.append("\n".join(self.text_info_header()))
+        out.append("")
 
         # ---------------
         # box score
         if not self.line_only:
-            print("")
-            print("\n".join(self.text_box_score()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.text_box_score()))
+            out.append("")
 
         # ---------------
         # line score
         if not self.box_only:
-            print("")
-            print("\n".join(self.text_line_score()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.text_line_score()))
+            out.append("")
 
         # ---------------
         # pitching summary
         if not self.line_only and not self.box_only:
-            print("")
-            print("\n".join(self.text_pitching_summary()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.text_pitching_summary()))
+            out.append("")
 
         # ---------------
         # team summaries
         if not self.line_only and not self.box_only:
-            print("")
+            out.append("")
             for who in ['away', 'home']:
-                print("\n".join(self.text_team_summary(who)))
-                print("")
+                out.append("\n".join(self.text_team_summary(who)))
+                out.append("")
 
         # ---------------
         # weather events
         if not self.line_only and not self.box_only:
             if len(d['weather_events'])>0:
-                print("")
-                print("\n".join(self.text_weather_events()))
-                print("")
+                out.append("")
+                out.append("\n".join(self.text_weather_events()))
+                out.append("")
+
+        return "\n".join(out) + "\n"
 
     def text_info_header(self):
         """
@@ -193,7 +240,6 @@ class TextView(BaseView):
 
     def text_pitching_summary(self):
         """Make a pitching summary for the text view"""
-        d = self.json_game_data
         pitching_summary = []
 
         ps = "Pitching Summary:"
@@ -201,13 +247,11 @@ class TextView(BaseView):
         pitching_summary.append("-"*len(ps))
         pitching_summary.append("")
 
-        pitching_summary.append("WP: %s"%(str(d['pitching_summary']['WP'])))
-        for k in ['WP-K', 'WP-BB']:
-            pitching_summary.append("%s: %s"%(k, str(sum(d['pitching_summary'][k]))))
-
-        pitching_summary.append("LP: %s"%(str(d['pitching_summary']['LP'])))
-        for k in ['LP-K', 'LP-BB']:
-            pitching_summary.append("%s: %s"%(k, str(sum(d['pitching_summary'][k]))))
+        for pitcher in self.presentation.pitchers:
+            p = pitcher['key']
+            pitching_summary.append("%s: %s"%(p, pitcher['name']))
+            pitching_summary.append("%s-K: %d"%(p, pitcher['K']))
+            pitching_summary.append("%s-BB: %d"%(p, pitcher['BB']))
 
         pitching_summary.append("")
 
@@ -215,133 +259,114 @@ class TextView(BaseView):
 
     def text_team_summary(self, who):
         """Make a team summary for the text view"""
-        d = self.json_game_data
-        summ = d['game_summary'][who]
+        team = self.presentation.teams[who]
         team_summary = []
 
-        ts = "Team Summary: %s"%(d['info']['%sTeamNickname'%(who)])
+        ts = "Team Summary: %s"%(team['nickname'])
         team_summary.append(ts)
         team_summary.append("-"*len(ts))
 
         # Fielding summary
-        if summ['fielding']['DP']>0 or summ['fielding']['TP']>0:
+        if len(team['fielding'])>0:
             team_summary.append("Fielding:")
-            for k in ['DP', 'TP']:
-                n = summ['fielding'][k]
-                if n > 0:
-                    team_summary.append("%s: %d"%(k, n))
+            for k, n in team['fielding']:
+                team_summary.append("%s: %d"%(k, n))
             team_summary.append("")
 
         # Batting summary
         team_summary.append("Batting:")
-        team_summary.append("RBI: %d"%(sum(summ['batting']['RBI'].values())))
-        for k in ['GS', 'HR', '3B', '2B', '1B', 'BB', 'K', 'SAC', 'GDP']:
-            bmap = summ['batting'][k]
-            if len(bmap.items())==0:
-                continue
-            # This string is the line to print for this stat
-            line = "%s: "%(k)
-            # Re-sort the map by value, highest to lowest
-            newbmap = {k: v for k, v in sorted(bmap.items(), reverse=True, key=lambda item: item[1])}
-            # Assemble BatterName (count) list
-            to_add = []
-            for player, value in newbmap.items():
-                # Ignore singles, Ks, or BBs unless 2 or more
-                if (k=='1B' or k=='K' or k=='BB') and value<2:
-                    continue
-                # Format as Batter Name (n)
-                to_add.append("%s (%d)"%(player, value))
-            if len(to_add)>0:
-                # Make it pretty and print
-                line += ", ".join(to_add)
-                team_summary.append(line)
-        team_summary.append("LOB: %d"%(summ['batting']['LOB']))
+        team_summary.append("RBI: %d"%(team['RBI']))
+        for k, leaders in team['batting']:
+            team_summary.append("%s: %s"%(k, Presentation.format_leaders(leaders)))
+        team_summary.append("LOB: %d"%(team['LOB']))
         team_summary.append("")
 
         # Baserunning summary
-        if len(summ['baserunning']['CS'])>0 or len(summ['baserunning']['SB'])>0:
+        if len(team['baserunning'])>0:
             team_summary.append("Baserunning:")
-            for k in ['SB', 'CS']:
-                bmap = summ['baserunning'][k]
-                if len(bmap.items())==0:
-                    continue
-                # This string is the line to print for this stat
-                line = "%s: "%(k)
-                # Re-sort the map by value, highest to lowest
-                newbmap = {k: v for k, v in sorted(bmap.items(), reverse=True, key=lambda item: item[1])}
-                # Assemble BatterName (count) list
-                to_add = []
-                for player, value in newbmap.items():
-                    to_add.append("%s (%d)"%(player, value))
-                if len(to_add)>0:
-                    # Make it pretty and print
-                    line += ", ".join(to_add)
-                    team_summary.append(line)
+            for k, leaders in team['baserunning']:
+                team_summary.append("%s: %s"%(k, Presentation.format_leaders(leaders)))
             team_summary.append("")
 
         return team_summary
 
     def text_weather_events(self):
-        d = self.json_game_data
         weather_summary = []
 
         we = "Weather Events:"
         weather_summary.append(we)
         weather_summary.append("-"*len(we))
-        weather_summary.append("\n".join(d['weather_events']))
+        weather_summary.append("\n".join(self.presentation.weather_events))
         weather_summary.append("")
 
         return weather_summary
 
 
 class RichView(TextView):
-    def show(self):
-        d = self.json_game_data
+    # Width of the tables when rendered to a string instead of the terminal
+    RENDER_WIDTH = 120
 
+    def show(self):
         console = Console()
+        for item in self.rich_items():
+            console.print(item)
+
+    def render(self):
+        """Render the rich tables as plain text (without color)"""
+        console = Console(file=io.StringIO(), width=self.RENDER_WIDTH)
+        for item in self.rich_items():
+            console.print(item)
+        return console.file.getvalue()
+
+    def rich_items(self):
+        """Return the list of things (text or rich tables) to print, in order"""
+        d = self.json_game_data
+        items = []
 
         # ---------------
         # game info
-        console.print("")
-        console.print("\n".join(self.text_info_header()))
-        console.print("")
+        items.append("")
+        items.append("\n".join(self.text_info_header()))
+        items.append("")
 
         # ---------------
         # box score
         if not self.line_only:
-            console.print("")
-            console.print(self.rich_box_score())
-            console.print("")
+            items.append("")
+            items.append(self.rich_box_score())
+            items.append("")
 
         # ---------------
         # line score
         if not self.box_only:
-            console.print("")
-            console.print(self.rich_line_score())
-            console.print("")
+            items.append("")
+            items.append(self.rich_line_score())
+            items.append("")
 
         # ---------------
         # pitching summary
         if not self.line_only and not self.box_only:
-            console.print("")
-            console.print(self.rich_pitching_summary())
-            console.print("")
+            items.append("")
+            items.append(self.rich_pitching_summary())
+            items.append("")
 
         # ---------------
         # team summaries
         if not self.line_only and not self.box_only:
-            console.print("")
+            items.append("")
             for who in ['away', 'home']:
-                console.print(self.rich_team_summary(who))
-                console.print("")
+                items.append(self.rich_team_summary(who))
+                items.append("")
 
         # ---------------
         # weather events
         if not self.line_only and not self.box_only:
             if len(d['weather_events'])>0:
-                console.print("")
-                console.print(self.rich_weather_events())
-                console.print("")
+                items.append("")
+                items.append(self.rich_weather_events())
+                items.append("")
+
+        return items
 
     def rich_box_score(self):
         """Make a box score for a rich view"""
@@ -390,160 +415,116 @@ class RichView(TextView):
         return table
 
     def rich_pitching_summary(self):
-        d = self.json_game_data
-
         table = Table(show_header=True, header_style="bold")
 
         ps = "Pitching Summary:"
         table.add_column(ps)
 
-        table.add_row("[bold]Winning Pitcher:[/bold] %s"%(d['pitching_summary']['WP']))
-        table.add_row("K: %d"%(d['pitching_summary']['WP-K']))
-        table.add_row("BB: %d"%(d['pitching_summary']['WP-BB']))
-
-        table.add_row("[bold]Losing Pitcher:[/bold] %s"%(d['pitching_summary']['LP']))
-        table.add_row("K: %d"%(d['pitching_summary']['LP-K']))
-        table.add_row("BB: %d"%(d['pitching_summary']['LP-BB']))
+        for pitcher in self.presentation.pitchers:
+            table.add_row("[bold]%s Pitcher:[/bold] %s"%(pitcher['result'], pitcher['name']))
+            table.add_row("K: %d"%(pitcher['K']))
+            table.add_row("BB: %d"%(pitcher['BB']))
 
         table.add_row(" ")
 
         return table
 
     def rich_team_summary(self, who):
-        d = self.json_game_data
-        summ = d['game_summary'][who]
+        team = self.presentation.teams[who]
 
         table = Table(show_header=True, header_style="bold")
 
-        ts = "Team Summary: %s"%(d['info']['%sTeamNickname'%(who)])
+        ts = "Team Summary: %s"%(team['nickname'])
         table.add_column(ts)
 
         # Fielding summary
-        if summ['fielding']['DP']>0 or summ['fielding']['TP']>0:
+        if len(team['fielding'])>0:
             table.add_row("[bold]Fielding:[/bold]")
-
-            fielding_summary = []
-            for k in ['DP', 'TP']:
-                n = summ['fielding'][k]
-                if n > 0:
-                    fielding_summary.append("%s: %d"%(k, n))
-
-            table.add_row("\n".join(fielding_summary))
+            table.add_row("\n".join("%s: %d"%(k, n) for k, n in team['fielding']))
         table.add_row(" ")
 
         # Batting summary
         table.add_row("[bold]Batting:[/bold]")
 
         batting_summary = []
-        batting_summary.append("RBI: %d"%(summ['batting']['RBI']))
-        for k in ['HR', '3B', '2B', '1B', 'BB', 'K', 'SAC', 'GDP']:
-            bmap = summ['batting'][k]
-            if len(bmap.items())==0:
-                continue
-            # This string is the line to print for this stat
-            line = "%s: "%(k)
-            # Re-sort the map by value, highest to lowest
-            newbmap = {k: v for k, v in sorted(bmap.items(), reverse=True, key=lambda item: item[1])}
-            # Assemble BatterName (count) list
-            to_add = []
-            for player, value in newbmap.items():
-                if (k=='1B' or k=='K' or k=='BB') and value<2:
-                    continue
-                to_add.append("%s (%d)"%(player, value))
-            if len(to_add)>0:
-                # Make it pretty and print
-                line += ", ".join(to_add)
-                batting_summary.append(line)
-        batting_summary.append("LOB: %d"%(summ['batting']['LOB']))
+        batting_summary.append("RBI: %d"%(team['RBI']))
+        for k, leaders in team['batting']:
+            batting_summary.append("%s: %s"%(k, Presentation.format_leaders(leaders)))
+        batting_summary.append("LOB: %d"%(team['LOB']))
         table.add_row("\n".join(batting_summary))
         table.add_row(" ")
 
         # Baserunning summary
-        if len(summ['baserunning']['CS'])>0 or len(summ['baserunning']['SB'])>0:
+        if len(team['baserunning'])>0:
             table.add_row("[bold]Baserunning:[/bold]")
-
-            baserunning_summary = []
-            for k in ['SB', 'CS']:
-                bmap = summ['baserunning'][k]
-                if len(bmap.items())==0:
-                    continue
-                # This string is the line to print for this stat
-                line = "%s: "%(k)
-                # Re-sort the map by value, highest to lowest
-                newbmap = {k: v for k, v in sorted(bmap.items(), reverse=True, key=lambda item: item[1])}
-                # Assemble BatterName (count) list
-                to_add = []
-                for player, value in newbmap.items():
-                    to_add.append("%s (%d)"%(player, value))
-                if len(to_add)>0:
-                    # Make it pretty and print
-                    line += ", ".join(to_add)
-                    baserunning_summary.append(line)
-
-            table.add_row("\n".join(baserunning_summary))
+            table.add_row("\n".join(
+                "%s: %s"%(k, Presentation.format_leaders(leaders))
+                for k, leaders in team['baserunning']
+            ))
             table.add_row(" ")
 
         return table
 
     def rich_weather_events(self):
-        d = self.json_game_data
-
         table = Table(show_header=True, header_style="bold")
 
         we = "Weather Events:"
         table.add_column(we)
-        for event in d['weather_events']:
+        for event in self.presentation.weather_events:
             table.add_row(event)
 
         return table
 
 
 class MarkdownView(TextView):
-    def show(self):
+    def render(self):
         d = self.json_game_data
+        out = []
 
         # ---------------
         # game info
-        print("")
-        print("\n".join(self.md_info_header()))
-        print("")
+        out.append("")
+        out.append("\n".join(self.md_info_header()))
+        out.append("")
 
         # ---------------
         # box score
         if not self.line_only:
-            print("")
-            print("\n".join(self.md_box_score()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.md_box_score()))
+            out.append("")
 
         # ---------------
         # line score
         if not self.box_only:
-            print("")
-            print("\n".join(self.md_line_score()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.md_line_score()))
+            out.append("")
 
         # ---------------
         # pitching summary
         if not self.box_only and not self.line_only:
-            print("")
-            print("\n".join(self.md_pitching_summary()))
-            print("")
+            out.append("")
+            out.append("\n".join(self.md_pitching_summary()))
+            out.append("")
 
         # ---------------
         # team summaries
         if not self.box_only and not self.line_only:
             for who in ['away', 'home']:
-                print("")
-                print("\n".join(self.md_team_summary(who)))
-                print("")
+                out.append("")
+                out.append("\n".join(self.md_team_summary(who)))
+                out.append("")
 
         # ---------------
         # weather events
         if not self.box_only and not self.line_only:
             if len(d['weather_events'])>0:
-                print("")
-                print("\n".join(self.md_weather_events()))
-                print("")
+                out.append("")
+                out.append("\n".join(self.md_weather_events()))
+                out.append("")
+
+        return "\n".join(out) + "\n"
 
     def md_info_header(self):
         text_info_header = self.text_info_header()
@@ -619,82 +600,61 @@ class MarkdownView(TextView):
 
     def md_pitching_summary(self):
         """Make a pitching summary for a markdown view"""
-        d = self.json_game_data
         pitching_summary = []
 
         pitching_summary.append("| Pitching Summary |")
         pitching_summary.append("| --- |")
-        pitching_summary.append("| **Winning Pitcher**: %s<br />KK: %d<br />BB: %d |"%(
-            d['pitching_summary']['WP'],
-            d['pitching_summary']['WP-K'],
-            d['pitching_summary']['WP-BB'],
-        ))
-        pitching_summary.append("| **Losing Pitcher**: %s<br />KK: %d<br />BB: %d |"%(
-            d['pitching_summary']['LP'],
-            d['pitching_summary']['LP-K'],
-            d['pitching_summary']['LP-BB'],
-        ))
+        for pitcher in self.presentation.pitchers:
+            pitching_summary.append("| **%s Pitcher**: %s<br />KK: %d<br />BB: %d |"%(
+                pitcher['result'],
+                pitcher['name'],
+                pitcher['K'],
+                pitcher['BB'],
+            ))
 
         return pitching_summary
 
     def md_team_summary(self, who):
-        d = self.json_game_data
-        summ = d['game_summary'][who]
+        team = self.presentation.teams[who]
 
         team_summary = []
 
-        ts = "| Team Summary: %s |"%(d['info']['%sTeamNickname'%(who)])
+        ts = "| Team Summary: %s |"%(team['nickname'])
         team_summary.append(ts)
         team_summary.append("| --- |")
 
         # Fielding summary
-        if summ['fielding']['DP']>0 or summ['fielding']['TP']>0:
+        if len(team['fielding'])>0:
             team_summary.append("| **Fielding:** |")
-
-            fielding_summary = []
-            for k in ['DP', 'TP']:
-                n = summ['fielding'][k]
-                if n > 0:
-                    fielding_summary.append("%s: %d"%(k, n))
-
-            team_summary.append("| " + " <br />".join(fielding_summary) + " |")
+            team_summary.append("| " + " <br />".join("%s: %d"%(k, n) for k, n in team['fielding']) + " |")
 
         # Batting summary
         team_summary.append("| **Batting:** |")
 
         batting_summary = []
-        batting_summary.append("RBI: %d"%(summ['batting']['RBI']))
-        for k in ['HR', '3B', '2B', '1B', 'BB', 'K', 'SAC', 'GDP']:
-            bmap = summ['batting'][k]
-            if len(bmap.items())==0:
-                continue
-            # This string is the line to print for this stat
-            line = "%s: "%(k)
-            # Re-sort the map by value, highest to lowest
-            newbmap = {k: v for k, v in sorted(bmap.items(), reverse=True, key=lambda item: item[1])}
-            # Assemble BatterName (count) list
-            to_add = []
-            for player, value in newbmap.items():
-                if (k=='1B' or k=='K' or k=='BB') and value<2:
-                    continue
-                to_add.append("%s (%d)"%(player, value))
-            if len(to_add)>0:
-                # Make it pretty and print
-                line += ", ".join(to_add)
-                batting_summary.append(line)
-        batting_summary.append("LOB: %d"%(summ['batting']['LOB']))
+        batting_summary.append("RBI: %d"%(team['RBI']))
+        for k, leaders in team['batting']:
+            batting_summary.append("%s: %s"%(k, Presentation.format_leaders(leaders)))
+        batting_summary.append("LOB: %d"%(team['LOB']))
         team_summary.append("| " + " <br />".join(batting_summary) + " |")
+
+        # Baserunning summary
+        if len(team['baserunning'])>0:
+            team_summary.append("| **Baserunning:** |")
+            team_summary.append("| " + " <br />".join(
+                "%s: %s"%(k, Presentation.format_leaders(leaders))
+                for k, leaders in team['baserunning']
+            ) + " |")
+
         return team_summary
 
     def md_weather_events(self):
-        d = self.json_game_data
         weather_summary = []
 
         we = "| **Weather Events:** |"
         weather_summary.append(we)
         weather_summary.append("| --- |")
-        for event in d['weather_events']:
+        for event in self.presentation.weather_events:
             weather_summary.append("| " + event + " |")
 
         return weather_summary
-
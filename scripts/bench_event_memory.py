@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+from types import SimpleNamespace
+
+"""
+Benchmark the peak memory used to read and parse the events of a game,
+comparing the old approach (decode the whole events response at once)
+with the new one (decode the response incrementally, one event at a time).
+
+Each approach runs in its own subprocess, so each gets its own peak RSS.
+The events are synthetic, and are read from a file standing in for the
+HTTP response body, so this does not need network access.
+"""
+
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, root_path)
+
+
+def make_events_file(path, n_events):
+    """Write a fake events API response with n_events events"""
+    r = random.Random(0)
+    event_types = ['SINGLE', 'DOUBLE', 'TRIPLE', 'HOME_RUN', 'STRIKEOUT', 'WALK', 'OUT', 'OUT', 'OUT']
+    with open(path, 'w') as f:
+        f.write('{"count": %d, "results": ['%(n_events))
+        outs = 0
+        for i in range(n_events):
+            inning = min(i//60, 8)
+            event_type = r.choice(event_types)
+            outs_on_play = 1 if event_type in ['OUT', 'STRIKEOUT'] else 0
+            event = dict(
+                id = "%032x"%(r.getrandbits(128)),
+                event_index = i,
+                inning = inning,
+                top_of_inning = (i//30)%2==0,
+                is_leadoff = outs==0,
+                event_type = event_type,
+                batter_id = "%032x"%(r.getrandbits(128)),
+                pitcher_id = "%032x"%(r.getrandbits(128)),
+                home_score = 0,
+                away_score = 0,
+                bases_hit = 1 if event_type=='SINGLE' else 0,
+                runs_batted_in = 0,
+                errors_on_play = 0,
+                is_double_play = False,
+                is_triple_play = False,
+                outs_before_play = outs,
+                outs_on_play = outs_on_play,
+                is_last_game_event = (i==n_events-1),
+                event_text = ["Batter steps up to bat.", "Something happens on this play."],
+                pitches = ["B", "S", "F", "X"],
+            )
+            outs = (outs + outs_on_play)%3
+            if i > 0:
+                f.write(', ')
+            json.dump(event, f)
+        f.write(']}')
+
+
+def make_parser(options=None):
+    from game_summary.parser import EventParser
+    game = SimpleNamespace(game=dict(
+        id='benchmark', season=0, day=0,
+        homeScore=1, awayScore=0,
+        homeTeamNickname='Sunbeams', awayTeamNickname='Tigers',
+        homeTeamName='Hellmouth Sunbeams', awayTeamName='Hades Tigers',
+        homeOdds=0.5, awayOdds=0.5, weather=1,
+        homePitcherName='A', awayPitcherName='B',
+    ))
+    if options is None:
+        options = SimpleNamespace(box_only=False, line_only=False)
+    return EventParser(game, options)
+
+
+def run_old(path):
+    """Read the whole response body, then decode all of it"""
+    parser = make_parser()
+    with open(path, 'rb') as f:
+        body = f.read()
+    events_json = json.loads(body)
+    for event in events_json['results']:
+        parser.parse(event)
+    return len(events_json['results'])
+
+
+def run_new(path):
+    """Decode the response body incrementally"""
+    from game_summary.jsonstream import iter_array_items, iter_file_chunks
+    parser = make_parser()
+    n = 0
+    with open(path, 'rb') as f:
+        for event in iter_array_items(iter_file_chunks(f)):
+            parser.parse(event)
+            n += 1
+    return n
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform=='darwin':
+        maxrss /= 1024
+    return maxrss/1024
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--events', type=int, default=20000, help='Number of events in the fake response')
+    p.add_argument('--run', choices=['old', 'new'], default=None, help=argparse.SUPPRESS)
+    p.add_argument('--path', default=None, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.run is not None:
+        # We are the subprocess: run one approach and report
+        baseline = peak_rss_mb()
+        n = {'old': run_old, 'new': run_new}[args.run](args.path)
+        print(json.dumps(dict(events=n, baseline_mb=baseline, peak_mb=peak_rss_mb())))
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'events.json')
+        make_events_file(path, args.events)
+        size_mb = os.path.getsize(path)/(1024*1024)
+        print("Events response: %d events, %.1f MB"%(args.events, size_mb))
+        for run in ['old', 'new']:
+            out = subprocess.check_output([sys.executable, __file__, '--run', run, '--path', path])
+            result = json.loads(out)
+            print("%-4s peak RSS: %7.1f MB (%.1f MB above interpreter baseline)"%(
+                run, result['peak_mb'], result['peak_mb'] - result['baseline_mb']
+            ))
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import tarfile
+import argparse
+import tempfile
+import subprocess
+from types import SimpleNamespace
+from bench_event_memory import make_events_file, make_parser
+
+"""
+Benchmark how many events per second the event parser can parse.
+
+The events are synthetic (see bench_event_memory.py) and are decoded
+before timing starts, so this measures only EventParser.parse().
+
+To compare with an older version of the parser, pass a git revision
+with --compare. That revision of the game_summary package is extracted
+to a temporary directory and benchmarked in a subprocess.
+
+Example:
+    python bench_parser.py --compare HEAD~1
+"""
+
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_events(n_events):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'events.json')
+        make_events_file(path, n_events)
+        with open(path, 'r') as f:
+            return json.load(f)['results']
+
+
+def run(n_events, repeat, options):
+    """Parse the events repeat times, and return the best events/sec"""
+    events = make_events(n_events)
+    best = None
+    for i in range(repeat):
+        parser = make_parser(options)
+        start = time.perf_counter()
+        for event in events:
+            parser.parse(event)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return n_events/best
+
+
+def extract_revision(rev, dest):
+    """Extract the game_summary package at a git revision into dest"""
+    archive = subprocess.check_output(['git', 'archive', rev, 'game_summary'], cwd=root_path)
+    with tempfile.TemporaryFile() as f:
+        f.write(archive)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(dest)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--events', type=int, default=20000, help='Number of events to parse')
+    p.add_argument('--repeat', type=int, default=5, help='Number of runs (the best one is reported)')
+    p.add_argument('--box-only', action='store_true', default=False, help='Benchmark the box score parser only')
+    p.add_argument('--line-only', action='store_true', default=False, help='Benchmark the line score parser only')
+    p.add_argument('--compare', default=None, help='Also benchmark the parser at this git revision')
+    p.add_argument('--package-path', default=root_path, help=argparse.SUPPRESS)
+    p.add_argument('--json', action='store_true', default=False, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    sys.path.insert(0, args.package_path)
+    options = SimpleNamespace(box_only=args.box_only, line_only=args.line_only)
+
+    if args.json:
+        # We are the subprocess benchmarking an older revision
+        print(json.dumps(run(args.events, args.repeat, options)))
+        return
+
+    results = []
+    if args.compare is not None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            extract_revision(args.compare, tmpdir)
+            cmd = [
+                sys.executable, __file__, '--json', '--package-path', tmpdir,
+                '--events', str(args.events), '--repeat', str(args.repeat)
+            ]
+            if args.box_only:
+                cmd.append('--box-only')
+            if args.line_only:
+                cmd.append('--line-only')
+            results.append((args.compare, json.loads(subprocess.check_output(cmd))))
+    results.append(('working tree', run(args.events, args.repeat, options)))
+
+    for label, rate in results:
+        print("%-16s %10.0f events/sec"%(label, rate))
+    if len(results)==2:
+        print("speedup: %.2fx"%(results[1][1]/results[0][1]))
+
+
+if __name__=="__main__":
+    main()
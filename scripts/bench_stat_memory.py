@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from types import SimpleNamespace
+from bench_parser import extract_revision
+
+"""
+Benchmark the memory used by the running state of event parsers
+over a season of synthetic games, with one parser per game kept
+alive at once (like following every game of a day, or parsing a
+batch of games before finalizing them).
+
+Reports the memory held by the parsers once all events are parsed,
+the peak while parsing, and the number of memory blocks allocated
+(from tracemalloc, so only memory allocated by Python is counted).
+
+To compare with an older version of the parser, pass a git revision
+with --compare, as with bench_parser.py:
+
+    python bench_stat_memory.py --compare HEAD~1
+"""
+
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+EVENT_TYPES = [
+    'SINGLE', 'DOUBLE', 'TRIPLE', 'HOME_RUN', 'STRIKEOUT', 'WALK', 'SACRIFICE',
+    'HIT_BY_PITCH', 'STOLEN_BASE', 'CAUGHT_STEALING', 'OUT', 'OUT', 'OUT', 'OUT'
+]
+
+
+def make_game(r, i):
+    """Make a fake game and its events"""
+    home_score, away_score = r.sample(range(12), 2)
+    game = SimpleNamespace(game=dict(
+        id='game%d'%(i), season=0, day=i%99,
+        homeScore=home_score, awayScore=away_score,
+        homeTeamNickname='Sunbeams', awayTeamNickname='Tigers',
+        homeTeamName='Hellmouth Sunbeams', awayTeamName='Hades Tigers',
+        homeOdds=0.5, awayOdds=0.5, weather=r.randint(0, 13),
+        homePitcherName='A', awayPitcherName='B',
+    ))
+    batters = {
+        True: ['%032x'%(r.getrandbits(128)) for j in range(9)],
+        False: ['%032x'%(r.getrandbits(128)) for j in range(9)],
+    }
+    events = []
+    n_innings = 9 + (r.random() < 0.1)*r.randint(1, 3)
+    for inning in range(n_innings):
+        for top in [True, False]:
+            outs = 0
+            while outs < 3:
+                event_type = r.choice(EVENT_TYPES)
+                outs_on_play = 1 if event_type in ['OUT', 'STRIKEOUT', 'CAUGHT_STEALING'] else 0
+                double_play = event_type=='OUT' and outs < 2 and r.random() < 0.1
+                if double_play:
+                    outs_on_play = 2
+                rbi = r.choice([0, 0, 1, 2, 4]) if event_type=='HOME_RUN' else r.choice([0, 0, 0, 1])
+                text = ["Batter hits the ball.", "Runner %d steals second base!"%(r.randint(0, 8))]
+                if event_type=='CAUGHT_STEALING':
+                    text = ["Runner %d gets caught stealing second base."%(r.randint(0, 8))]
+                if r.random() < 0.01:
+                    text.append("The Blooddrain gurgled!")
+                events.append(dict(
+                    inning=inning,
+                    top_of_inning=top,
+                    is_leadoff=outs==0,
+                    event_type=event_type,
+                    batter_id=r.choice(batters[top]),
+                    home_score=0,
+                    away_score=0,
+                    bases_hit=r.randint(1, 3) if event_type in ['SINGLE', 'DOUBLE', 'TRIPLE'] else 0,
+                    runs_batted_in=rbi,
+                    errors_on_play=r.random() < 0.02,
+                    is_double_play=double_play,
+                    is_triple_play=False,
+                    outs_before_play=outs,
+                    outs_on_play=outs_on_play,
+                    event_text=text,
+                ))
+                outs += outs_on_play
+    player_names = {j: 'Player %s'%(j[:6]) for side in batters.values() for j in side}
+    return game, events, player_names
+
+
+def run(n_games):
+    """Parse n_games games, keeping all parsers, and return memory stats"""
+    from game_summary.parser import EventParser
+    options = SimpleNamespace(box_only=False, line_only=False)
+    r = random.Random(0)
+    games = [make_game(r, i) for i in range(n_games)]
+
+    tracemalloc.start()
+    start_size, _ = tracemalloc.get_traced_memory()
+    start_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.reset_peak()
+    parsers = []
+    for game, events, player_names in games:
+        parser = EventParser(game, options, player_names)
+        for event in events:
+            parser.parse(event)
+        parsers.append(parser)
+    size, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return dict(
+        size = size - start_size,
+        peak = peak - start_size,
+        blocks = blocks - start_blocks
+    )
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--games', type=int, default=1000, help='Number of games to parse (about one season)')
+    p.add_argument('--compare', default=None, help='Also benchmark the parser at this git revision')
+    p.add_argument('--package-path', default=root_path, help=argparse.SUPPRESS)
+    p.add_argument('--json', action='store_true', default=False, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    sys.path.insert(0, args.package_path)
+
+    if args.json:
+        # We are the subprocess benchmarking an older revision
+        print(json.dumps(run(args.games)))
+        return
+
+    results = []
+    if args.compare is not None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            extract_revision(args.compare, tmpdir)
+            cmd = [
+                sys.executable, __file__, '--json', '--package-path', tmpdir,
+                '--games', str(args.games)
+            ]
+            results.append((args.compare, json.loads(subprocess.check_output(cmd))))
+    results.append(('working tree', run(args.games)))
+
+    print("%d games, one parser each"%(args.games))
+    for label, stats in results:
+        print("%-16s %8.1f MB held %8.1f MB peak %10d blocks held (%.0f per game)"%(
+            label,
+            stats['size']/(1024*1024),
+            stats['peak']/(1024*1024),
+            stats['blocks'],
+            stats['blocks']/args.games
+        ))
+
+
+if __name__=="__main__":
+    main()
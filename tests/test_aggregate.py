@@ -0,0 +1,80 @@
+from game_summary.aggregate import Aggregate
+
+
+"""
+Check the team totals that Aggregate adds up from game summaries.
+
+The game summaries are made up by hand, with only the sections the
+totals use.
+"""
+
+
+def make_summary(home_runs, away_runs, winner='home'):
+    """Make a game summary of a Sunbeams home game against the Tigers"""
+    batting = {
+        'H': [0]*9,
+        'LOB': 0,
+        'RBI': {},
+        'HR': {'Player A': 1},
+        'GS': {'Player B': 1},
+    }
+    return {
+        'info': {
+            'id': 'game',
+            'season': 1,
+            'homeTeamName': 'Hellmouth Sunbeams',
+            'awayTeamName': 'Hades Tigers',
+            'winner': winner,
+        },
+        'box_score': {
+            'home': [home_runs, 8, 0],
+            'away': [away_runs, 6, 1],
+        },
+        'pitching_summary': {
+            'WP': 'Home Pitcher' if winner=='home' else 'Away Pitcher',
+            'LP': 'Away Pitcher' if winner=='home' else 'Home Pitcher',
+            'WP-K': [1]*9, 'WP-BB': [0]*9,
+            'LP-K': [2]*9, 'LP-BB': [1]*9,
+        },
+        'game_summary': {
+            who: {
+                'fielding': {'DP': 0, 'TP': 0},
+                'batting': dict(batting),
+                'baserunning': {'SB': {}, 'CS': {}},
+            }
+            for who in ['home', 'away']
+        },
+    }
+
+
+def test_winner_comes_from_info():
+    # The runs counted from the events say the away team won
+    # (like when the weather changes the score), but it did not
+    totals = Aggregate.from_games([make_summary(3, 5, winner='home')]).get_json()['teams']
+    home, away = totals['Hellmouth Sunbeams'], totals['Hades Tigers']
+    assert (home['wins'], home['losses']) == (1, 0)
+    assert (away['wins'], away['losses']) == (0, 1)
+    assert home['pitching']['W'] == {'Home Pitcher': 1}
+    assert home['pitching']['K'] == 9
+    assert away['pitching']['L'] == {'Away Pitcher': 1}
+    assert away['pitching']['K'] == 18
+
+
+def test_counted_runs_tied():
+    totals = Aggregate.from_games([make_summary(4, 4, winner='away')]).get_json()['teams']
+    assert totals['Hades Tigers']['wins'] == 1
+    assert totals['Hellmouth Sunbeams']['losses'] == 1
+
+
+def test_summary_without_winner():
+    # Game summaries saved before the winner was in the info
+    summary = make_summary(3, 5)
+    del summary['info']['winner']
+    totals = Aggregate.from_games([summary]).get_json()['teams']
+    assert totals['Hades Tigers']['wins'] == 1
+
+
+def test_table_home_runs_include_grand_slams():
+    rows = Aggregate.from_games([make_summary(5, 3), make_summary(6, 2)]).get_table()
+    hr = Aggregate.TABLE_COLUMNS.index('HR')
+    assert [row[hr] for row in rows] == [4, 4]
@@ -0,0 +1,115 @@
+import io
+import json
+import random
+import pytest
+from game_summary.jsonstream import iter_array_items, iter_file_chunks
+
+
+"""
+Check that iter_array_items decodes the same items as json.loads,
+however the JSON is cut into chunks: one byte at a time, in the
+middle of numbers, strings and multi-byte characters, and with
+other top-level keys before and after the list.
+"""
+
+
+def make_response(r, n):
+    """Make an events API style response with n events"""
+    events = [
+        {
+            'id': 'event-%d'%(i),
+            'event_index': i,
+            'event_text': ["Jessica Telephone hits a Single! ⚾", "1 scores. \U0001F31E"],
+            'outs_before_play': r.randint(0, 2),
+            'batter_count': r.randint(0, 10**9),
+            'total_strikes': -r.randint(0, 10**6),
+            'runs_batted_in': r.random()*1e6,
+            'is_steal': r.random() < 0.5,
+            'fielder': None,
+            'base_runners': [r.randint(0, 99) for _ in range(r.randint(0, 3))],
+        }
+        for i in range(n)
+    ]
+    return {'count': n, 'results': events, 'next_page': 'abc "def"', 'total': 12345}
+
+
+def cut(data, r, max_size):
+    """Cut data into chunks of 1 to max_size"""
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        size = r.randint(1, max_size)
+        chunks.append(data[pos:pos+size])
+        pos += size
+    return chunks
+
+
+def decode(chunks, key='results'):
+    other = {}
+    items = list(iter_array_items(chunks, key=key, on_value=other.__setitem__))
+    return items, other
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_one_byte_chunks(indent):
+    response = make_response(random.Random(1), 20)
+    data = json.dumps(response, indent=indent, ensure_ascii=False).encode('utf-8')
+    items, other = decode([data[i:i+1] for i in range(len(data))])
+    assert items == response['results']
+    assert other == {k: v for k, v in response.items() if k!='results'}
+
+
+def test_random_chunks():
+    r = random.Random(2)
+    for n in range(10):
+        response = make_response(r, n)
+        text = json.dumps(response, ensure_ascii=r.random() < 0.5)
+        for chunks in [cut(text, r, 7), cut(text.encode('utf-8'), r, 13)]:
+            items, other = decode(chunks)
+            assert items == response['results']
+            assert other['total'] == 12345
+
+
+def test_numbers_cut_off():
+    # Each chunk boundary falls inside a number
+    items, _ = decode(['{"results": [12', '345, -6', '.', '5e', '1', ', 7', ']}'])
+    assert items == [12345, -65.0, 7]
+    items, _ = decode(['{"results": [1', '2', '3', ']', '}'])
+    assert items == [123]
+
+
+def test_keys_before_and_after():
+    data = '{"a": {"results": [1]}, "results": [{"x": [1, 2]}], "b": [3, 4], "c": "]}"}'
+    items, other = decode(cut(data, random.Random(3), 3))
+    assert items == [{'x': [1, 2]}]
+    assert other == {'a': {'results': [1]}, 'b': [3, 4], 'c': ']}'}
+
+
+def test_empty():
+    assert decode(['{}']) == ([], {})
+    assert decode(['{"results": [ ]}']) == ([], {})
+    assert decode(['{"count": 0, "results": []}']) == ([], {'count': 0})
+
+
+def test_other_key():
+    items, other = decode(['{"data": [1, 2], "results": 3}'], key='data')
+    assert items == [1, 2]
+    assert other == {'results': 3}
+
+
+@pytest.mark.parametrize('data', [
+    '{"results": [1, 2}',
+    '{"results": [1, 2]',
+    '{"results": [1, 2]} x',
+    '[1, 2]',
+])
+def test_bad_json(data):
+    with pytest.raises(json.JSONDecodeError):
+        decode([data[i:i+1] for i in range(len(data))])
+
+
+def test_file_chunks():
+    response = make_response(random.Random(4), 5)
+    f = io.BytesIO(json.dumps(response).encode('utf-8'))
+    items, _ = decode(iter_file_chunks(f, chunk_size=10))
+    assert items == response['results']
@@ -0,0 +1,204 @@
+import copy
+import json
+import random
+import pytest
+from types import SimpleNamespace
+from game_summary.data_raw import RawGameData
+from game_summary.parser import EventParser
+
+
+"""
+Check that one EventParser reused for many games (with reset())
+makes the same game summaries as a new parser for each game, that
+parsing does not change anything shared between parsers, and that
+parsing picked up from a checkpoint() ends the same as parsing the
+whole game in one go.
+
+Games and events are synthetic, and player names are given up
+front, so these tests do not need network access.
+"""
+
+
+EVENT_TYPES = [
+    'SINGLE', 'DOUBLE', 'TRIPLE', 'HOME_RUN', 'STRIKEOUT', 'WALK', 'SACRIFICE',
+    'HIT_BY_PITCH', 'STOLEN_BASE', 'CAUGHT_STEALING', 'OUT', 'OUT', 'OUT'
+]
+
+
+def make_game(r, i):
+    """Make a fake game, its events, and the names of its batters"""
+    home_score, away_score = r.sample(range(12), 2)
+    game = RawGameData('game%d'%(i), dict(
+        id='game%d'%(i), season=0, day=i,
+        homeScore=home_score, awayScore=away_score,
+        homeTeamNickname='Sunbeams', awayTeamNickname='Tigers',
+        homeTeamName='Hellmouth Sunbeams', awayTeamName='Hades Tigers',
+        homeOdds=0.5, awayOdds=0.5, weather=r.randint(0, 13),
+        homePitcherName='Home Pitcher %d'%(i), awayPitcherName='Away Pitcher %d'%(i),
+        homeTeamEmoji='0x1F31E', awayTeamEmoji='0x1F405',
+        isPostseason=False, seriesIndex=1, seriesLength=3, shame=False,
+    ))
+    batters = {
+        True: ['away-%d-%d'%(i, j) for j in range(9)],
+        False: ['home-%d-%d'%(i, j) for j in range(9)],
+    }
+    events = []
+    # Some games go to extra innings
+    n_innings = 9 + (i%3==0)*r.randint(1, 2)
+    for inning in range(n_innings):
+        for top in [True, False]:
+            outs = 0
+            while outs < 3:
+                event_type = r.choice(EVENT_TYPES)
+                outs_on_play = 1 if event_type in ['OUT', 'STRIKEOUT', 'CAUGHT_STEALING'] else 0
+                double_play = event_type=='OUT' and outs < 2 and r.random() < 0.2
+                if double_play:
+                    outs_on_play = 2
+                text = ["Batter hits the ball.", "Runner %d steals second base!"%(r.randint(0, 8))]
+                if event_type=='CAUGHT_STEALING':
+                    text = ["Runner %d gets caught stealing second base."%(r.randint(0, 8))]
+                if r.random() < 0.05:
+                    text.append("The Blooddrain gurgled!")
+                events.append(dict(
+                    inning=inning,
+                    top_of_inning=top,
+                    is_leadoff=outs==0,
+                    event_type=event_type,
+                    batter_id=r.choice(batters[top]),
+                    home_score=0,
+                    away_score=0,
+                    bases_hit=r.randint(1, 3) if event_type in ['SINGLE', 'DOUBLE', 'TRIPLE'] else 0,
+                    runs_batted_in=r.choice([1, 2, 4]) if event_type=='HOME_RUN' else r.choice([0, 0, 1]),
+                    errors_on_play=r.random() < 0.05,
+                    is_double_play=double_play,
+                    is_triple_play=False,
+                    outs_before_play=outs,
+                    outs_on_play=outs_on_play,
+                    event_text=text,
+                ))
+                outs += outs_on_play
+    player_names = {j: 'Player %s'%(j) for side in batters.values() for j in side}
+    return game, events, player_names
+
+
+def no_name_lookup(player_ids):
+    raise AssertionError("Player names should all be known: %s"%(player_ids))
+
+
+def parse_game(parser, events):
+    for event in events:
+        parser.parse(event)
+    parser.finalize()
+    return parser.get_json()
+
+
+def shared_state():
+    """Deep copies of the class attributes of EventParser"""
+    return {
+        k: copy.deepcopy(v)
+        for k, v in vars(EventParser).items()
+        if k.isupper()
+    }
+
+
+OPTIONS = [
+    dict(box_only=False, line_only=False),
+    dict(box_only=True, line_only=False),
+    dict(box_only=False, line_only=True),
+]
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_reused_parser_matches_new_parsers(options):
+    options = SimpleNamespace(**options)
+    r = random.Random(0)
+    games = [make_game(r, i) for i in range(20)]
+    player_names = {}
+    for game, events, names in games:
+        player_names.update(names)
+
+    expected = []
+    for game, events, names in games:
+        parser = EventParser(game, options, dict(player_names), name_lookup=no_name_lookup)
+        expected.append(copy.deepcopy(parse_game(parser, events)))
+
+    parser = None
+    results = []
+    for game, events, names in games:
+        if parser is None:
+            parser = EventParser(game, options, dict(player_names), name_lookup=no_name_lookup)
+        else:
+            parser.reset(game)
+        results.append(parse_game(parser, events))
+
+    for result, expect in zip(results, expected):
+        # (summaries of earlier games must not change as later games are parsed)
+        assert result==expect
+
+
+def test_parsing_does_not_change_class_attributes():
+    before = shared_state()
+    r = random.Random(1)
+    for options in OPTIONS:
+        options = SimpleNamespace(**options)
+        for i in range(5):
+            game, events, player_names = make_game(r, i)
+            parse_game(EventParser(game, options, player_names, name_lookup=no_name_lookup), events)
+    assert shared_state()==before
+
+
+def test_parsers_do_not_share_state():
+    options = SimpleNamespace(box_only=False, line_only=False)
+    r = random.Random(2)
+    (game1, events1, names1), (game2, events2, names2) = make_game(r, 0), make_game(r, 1)
+    parser1 = EventParser(game1, options, names1, name_lookup=no_name_lookup)
+    parser2 = EventParser(game2, options, names2, name_lookup=no_name_lookup)
+    expected = copy.deepcopy(parse_game(EventParser(game1, options, names1, name_lookup=no_name_lookup), events1))
+
+    # Interleave the events of the two games
+    for event1, event2 in zip(events1, events2):
+        parser1.parse(event1)
+        parser2.parse(event2)
+    for event in events1[len(events2):]:
+        parser1.parse(event)
+    parser1.finalize()
+    assert parser1.get_json()==expected
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_checkpoint_round_trip(options):
+    options = SimpleNamespace(**options)
+    r = random.Random(3)
+    for i in range(10):
+        game, events, player_names = make_game(r, i)
+        expected = parse_game(EventParser(game, options, player_names, name_lookup=no_name_lookup), events)
+
+        # Stop at a random point, save the state as JSON and carry
+        # on with a new parser
+        n = r.randint(0, len(events))
+        parser = EventParser(game, options, player_names, name_lookup=no_name_lookup)
+        for event in events[:n]:
+            parser.parse(event)
+        checkpoint = json.loads(json.dumps(parser.checkpoint()))
+        assert checkpoint['n_events']==n
+
+        restored = EventParser(game, options, player_names, name_lookup=no_name_lookup)
+        restored.restore(checkpoint)
+        assert restored.checkpoint()==checkpoint
+        assert parse_game(restored, events[n:])==expected
+
+
+def test_restore_other_game_or_mode():
+    r = random.Random(4)
+    (game1, events1, names1), (game2, events2, names2) = make_game(r, 0), make_game(r, 1)
+    full, box = [SimpleNamespace(**options) for options in OPTIONS[:2]]
+    parser = EventParser(game1, full, names1, name_lookup=no_name_lookup)
+    for event in events1[:10]:
+        parser.parse(event)
+    checkpoint = parser.checkpoint()
+    with pytest.raises(ValueError):
+        EventParser(game2, full, names2, name_lookup=no_name_lookup).restore(checkpoint)
+    with pytest.raises(ValueError):
+        EventParser(game1, box, names1, name_lookup=no_name_lookup).restore(checkpoint)
+    with pytest.raises(ValueError):
+        EventParser(game1, full, names1, name_lookup=no_name_lookup).restore(dict(checkpoint, version=-1))
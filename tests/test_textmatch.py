@@ -0,0 +1,69 @@
+import random
+import pytest
+from game_summary.textmatch import TextMatcher, get_matcher
+
+
+"""
+Check that TextMatcher finds the same lines and names as looking
+for each keyword in each line, both with a short list of keywords
+(looked for with `in`) and a long one (one combined pattern).
+"""
+
+
+WEATHER = ['blooddrain', 'incinerate', 'feedback', 'allergic', 'yummy']
+NAMES = {'SB': r'^(.*) (stole|steals)', 'CS': r'^(.*) gets caught stealing'}
+
+LINES = [
+    "Jessica Telephone hits a Single!",
+    "The Blooddrain gurgled!",
+    "Rogue Umpire incinerated Jaylen Hotdogfingers! (blooddrain incinerate)",
+    "Reality flickers. Things look different... feedback",
+    "Wyatt Quitter is allergic to peanuts! Yummy? yummy.",
+    "Sixpack Dogwalker steals second base!",
+    "Sixpack Dogwalker stole third base!",
+    "Jaylen Hotdogfingers gets caught stealing second base.",
+    "",
+]
+
+
+def naive_keyword_lines(keywords, lines):
+    return [line for k in keywords for line in lines if k in line]
+
+
+def many_keywords():
+    # More than MIN_REGEX_KEYWORDS, with the weather words among them
+    keywords = ['keyword%02d'%(i) for i in range(40)] + WEATHER
+    random.Random(1).shuffle(keywords)
+    return keywords
+
+
+@pytest.mark.parametrize('keywords', [WEATHER, many_keywords()])
+def test_keyword_lines(keywords):
+    matcher = TextMatcher(keywords, NAMES)
+    assert (matcher.keyword_regex is None) == (len(keywords) < TextMatcher.MIN_REGEX_KEYWORDS)
+    r = random.Random(2)
+    for _ in range(500):
+        lines = r.sample(LINES, r.randint(1, 4))
+        if r.random() < 0.2:
+            lines.append('a line with %s in it'%(r.choice(keywords)))
+        text = "\n".join(lines)
+        assert matcher.keyword_lines(text, lines) == naive_keyword_lines(keywords, lines)
+
+
+def test_keyword_line_twice():
+    matcher = TextMatcher(many_keywords(), NAMES)
+    lines = ["A blooddrain and an incinerate", "Nothing"]
+    assert matcher.keyword_lines("\n".join(lines), lines) == [lines[0], lines[0]]
+
+
+def test_find_name():
+    matcher = get_matcher(WEATHER, NAMES)
+    text = "\n".join(["Hits a Single!", LINES[6], LINES[5]])
+    assert matcher.find_name('SB', text) == 'Sixpack Dogwalker'
+    assert matcher.find_name('CS', text) is None
+    assert matcher.find_name('CS', LINES[7]) == 'Jaylen Hotdogfingers'
+
+
+def test_get_matcher_cached():
+    assert get_matcher(WEATHER, NAMES) is get_matcher(list(WEATHER), dict(NAMES))
+    assert get_matcher(WEATHER, NAMES) is not get_matcher(WEATHER[:2], NAMES)